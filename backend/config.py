@@ -38,17 +38,40 @@ class Settings(BaseSettings):
     BEDROCK_FALLBACK_MODELS: list = [
         "anthropic.claude-3-haiku-20240307-v1:0",  # Claude Haiku
     ]
+    # Narrative text chunks sent to the LLM in one extraction request
+    NARRATIVE_CHUNKS_PER_CALL: int = 4
+    NARRATIVE_CONCURRENCY: int = 4  # narrative LLM requests in flight
+    NARRATIVE_LLM_CACHE_TTL: int = 604800  # 7 days; 0 disables the response cache
+    NARRATIVE_LATENCY_OPTIMIZED: bool = True  # Bedrock latency-optimized inference where offered
     
     # Weaviate
     WEAVIATE_URL: str = "http://localhost:8080"
     ENABLE_WEAVIATE: bool = False
     WEAVIATE_API_KEY: Optional[str] = None
+    # Client-side batching for entity imports
+    WEAVIATE_BATCH_SIZE: int = 100
+    WEAVIATE_CONCURRENCY: int = 2  # parallel batch requests in flight
+    # Let the batcher size requests from the server's queue depth; fixed_size otherwise
+    WEAVIATE_DYNAMIC_BATCHING: bool = True
+    # sentence-transformers model for client-side embeddings (requires the
+    # sentence-transformers package). None keeps Weaviate's text2vec_transformers
+    # vectorizer; set it before the collections are first created.
+    EMBEDDING_MODEL: Optional[str] = None
+    EMBEDDING_BATCH_SIZE: int = 64
     
     # Neo4j
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str
+    NEO4J_DATABASE: Optional[str] = None  # None uses the server's default database
     ENABLE_NEO4J: bool = False
+    # Driver connection pool
+    NEO4J_POOL_SIZE: int = 50
+    NEO4J_ACQ_TIMEOUT: float = 60.0  # seconds to wait for a pooled connection
+    NEO4J_MAX_CONNECTION_LIFETIME: int = 3600  # seconds
+    NEO4J_CONNECTION_TIMEOUT: float = 30.0  # seconds
+    NEO4J_FETCH_SIZE: int = 1000  # records pulled per batch on read sessions
+    NEO4J_WRITE_BATCH_SIZE: int = 1000  # rows per UNWIND write transaction
     
     # Storage
     UPLOAD_DIR: str = "./uploads"
@@ -56,10 +79,14 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 104857600  # 100MB
     # ADE routing threshold: files larger than this use async jobs
     ADE_SYNC_MAX_BYTES: int = 15728640  # 15MB default
+    # Worker processes for the deterministic invoice/contract/loan parsers
+    PARSER_WORKERS: int = 2
     
     # Logging
     LOG_LEVEL: str = "DEBUG"  # Temporarily DEBUG to trace property extraction
     LOG_FILE: str = "logs/arthanethra.log"
+    # Write each markdown table extraction result to /tmp for inspection
+    MARKDOWN_DEBUG_DUMP: bool = False
     
     # JWT (for future auth)
     JWT_SECRET: str = "your-secret-key-change-this"
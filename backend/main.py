@@ -6,16 +6,17 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse
 from pydantic import BaseModel
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Optional, List, Dict, Any
 import uvicorn
+import sys
 
 from config import settings
 from services import (
     IngestionService,
     ExtractionService,
     NormalizationService,
-    IndexingService,
+    get_indexing_service,
     RiskDetectionService,
     ChatbotService
 )
@@ -27,34 +28,56 @@ import json
 from pathlib import Path
 from datetime import datetime
 
-# Configure logging
-logger.add(
-    settings.LOG_FILE,
-    rotation="500 MB",
-    level=settings.LOG_LEVEL,
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
-)
-
-
-# Initialize services (before app creation so they're available in lifespan)
-ingestion_service = IngestionService()
-extraction_service = ExtractionService()
-normalization_service = NormalizationService()
-indexing_service = IndexingService()
-risk_detection_service = RiskDetectionService()
-chatbot_service = ChatbotService()
-
-# Import persistence service
-from services.persistence import PersistenceService
-persistence_service = PersistenceService()
+# Spawned worker processes (the deterministic parser pool) re-import this file
+# as __mp_main__ when the app is started with `python main.py`. They only need
+# its definitions, not a second set of log sinks and service connections.
+if __name__ != "__mp_main__":
+    # Configure logging. enqueue=True hands records to a background writer so
+    # sinks never block the event loop during high-throughput ingestion.
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True)
+    logger.add(
+        settings.LOG_FILE,
+        rotation="500 MB",
+        level=settings.LOG_LEVEL,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+        enqueue=True
+    )
+    
+    # Initialize services (before app creation so they're available in lifespan)
+    ingestion_service = IngestionService()
+    extraction_service = ExtractionService()
+    normalization_service = NormalizationService()
+    indexing_service = get_indexing_service()
+    risk_detection_service = RiskDetectionService()
+    chatbot_service = ChatbotService()
+    
+    # Import persistence service
+    from services.persistence import PersistenceService
+    persistence_service = PersistenceService()
 
 
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events - handles startup and shutdown"""
+    # Services close in reverse order on shutdown, even if startup fails
+    # part-way or one of them raises while closing
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(logger.complete)
+        await stack.enter_async_context(indexing_service)
+        await stack.enter_async_context(extraction_service)
+        await stack.enter_async_context(normalization_service)
+        await _startup()
+        yield
+        _shutdown()
+
+
+async def _startup():
+    """Startup work: schema setup and loading persisted state"""
     # Startup
     logger.info("Starting ArthaNethra API")
+    indexing_service.init_schema()
     
     # Load persisted state from disk
     global documents_store, graphs_store, entities_store, chat_sessions_store, chat_messages_store, jobs_store, risks_store
@@ -104,9 +127,10 @@ async def lifespan(app: FastAPI):
         
     except Exception as e:
         logger.warning(f"Could not load persisted state: {e}")
-    
-    yield
-    
+
+
+def _shutdown():
+    """Shutdown work: persist in-memory state to disk"""
     # Shutdown
     logger.info("Shutting down ArthaNethra API")
     
@@ -123,9 +147,6 @@ async def lifespan(app: FastAPI):
         logger.info("State saved to disk")
     except Exception as e:
         logger.error(f"Failed to save state: {e}")
-    
-    # Cleanup services
-    await extraction_service.close()
 
 
 # Create FastAPI app
@@ -229,7 +250,7 @@ async def ingest_document(file: UploadFile = File(...)):
         
         # Ingest document
         document = await ingestion_service.ingest_document(
-            file.file,
+            file,
             file.filename,
             file.content_type
         )
@@ -10,7 +10,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.indexing import IndexingService
+from services.indexing import get_indexing_service
 from loguru import logger
 
 
@@ -21,7 +21,7 @@ def main():
     print("🔍 ArthaNethra Knowledge Graph Diagnostic")
     print("="*60 + "\n")
     
-    indexing = IndexingService()
+    indexing = get_indexing_service()
     
     if not indexing.neo4j_driver:
         print("❌ Neo4j driver not available!")
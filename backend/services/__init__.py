@@ -4,7 +4,7 @@ Business logic services for ArthaNethra
 from .ingestion import IngestionService
 from .extraction import ExtractionService
 from .normalization import NormalizationService
-from .indexing import IndexingService
+from .indexing import IndexingService, get_indexing_service
 from .risk_detection import RiskDetectionService
 from .chatbot import ChatbotService
 from .markdown_parser import MarkdownTableParser
@@ -18,6 +18,7 @@ __all__ = [
     "ExtractionService",
     "NormalizationService",
     "IndexingService",
+    "get_indexing_service",
     "RiskDetectionService",
     "ChatbotService",
     "MarkdownTableParser",
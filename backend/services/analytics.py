@@ -16,6 +16,8 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from loguru import logger
 
+from config import settings
+
 
 @dataclass
 class EntityRecord:
@@ -754,7 +756,7 @@ class AnalyticsService:
 
         logger.info(f"Fetching entities: type={entity_type}, graph_id={graph_id}, limit={limit}")
 
-        with driver.session() as session:
+        with driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
             # Try with graph_id filter first if provided
             if graph_id:
                 result = session.run(
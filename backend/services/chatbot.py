@@ -7,7 +7,7 @@ from typing import AsyncGenerator, Dict, Any, List, Optional, Set
 from loguru import logger
 
 from config import settings
-from services.indexing import IndexingService
+from services.indexing import get_indexing_service
 from services.analytics import AnalyticsService
 
 
@@ -23,7 +23,7 @@ class ChatbotService:
         )
         self.model_id = settings.BEDROCK_MODEL_ID
         self.fallback_models = getattr(settings, 'BEDROCK_FALLBACK_MODELS', [])
-        self.indexing_service = IndexingService()
+        self.indexing_service = get_indexing_service()
         self.analytics_service = AnalyticsService(self.indexing_service)
         
         # Define tools for AWS Bedrock models
@@ -778,7 +778,7 @@ Only include entities and relationships that are EXPLICITLY mentioned in your re
             sources: List[str] = []
             neo4j_results: List[Dict[str, Any]] = []
 
-            if self.indexing_service.neo4j_driver and (property_filters or entity_types or query_text):
+            if self.indexing_service.neo4j_async_driver and (property_filters or entity_types or query_text):
                 try:
                     neo4j_results = await self._query_neo4j_with_filters(
                         query_text=query_text,
@@ -1009,7 +1009,7 @@ Keep it under 200 words and professional."""
     
     async def _tool_graph_traverse(self, params: Dict) -> Dict:
         """Traverse relationships from a starting entity using Neo4j"""
-        if not self.indexing_service.neo4j_driver:
+        if not self.indexing_service.neo4j_async_driver:
             return {"error": "Neo4j not available", "results": []}
         
         entity_name = params["entity_name"]
@@ -1050,11 +1050,11 @@ Keep it under 200 words and professional."""
         """
         
         try:
-            with self.indexing_service.neo4j_driver.session() as session:
-                result = session.run(cypher, entity_name=entity_name)
+            async with self.indexing_service.neo4j_async_driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
+                result = await session.run(cypher, entity_name=entity_name)
                 
                 connected_entities = []
-                for record in result:
+                async for record in result:
                     connected_entities.append({
                         "id": record["id"],
                         "name": record["name"],
@@ -1081,7 +1081,7 @@ Keep it under 200 words and professional."""
     
     async def _tool_graph_path(self, params: Dict) -> Dict:
         """Find shortest path between two entities using Neo4j"""
-        if not self.indexing_service.neo4j_driver:
+        if not self.indexing_service.neo4j_async_driver:
             return {"error": "Neo4j not available", "path": []}
         
         from_entity = params["from_entity"]
@@ -1091,15 +1091,17 @@ Keep it under 200 words and professional."""
         logger.info(f"Finding path: {from_entity} -> {to_entity} (max depth: {max_depth})")
 
         try:
-            with self.indexing_service.neo4j_driver.session() as session:
+            async with self.indexing_service.neo4j_async_driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
                 exists_query = """
                 MATCH (n:Entity {name: $name})
                 RETURN n
                 LIMIT 1
                 """
 
-                start_exists = session.run(exists_query, name=from_entity).single() is not None
-                end_exists = session.run(exists_query, name=to_entity).single() is not None
+                result = await session.run(exists_query, name=from_entity)
+                start_exists = await result.single() is not None
+                result = await session.run(exists_query, name=to_entity)
+                end_exists = await result.single() is not None
 
                 if not start_exists or not end_exists:
                     missing = []
@@ -1139,13 +1141,13 @@ Keep it under 200 words and professional."""
                 LIMIT 1
                 """ % max_depth
 
-                result = session.run(
+                result = await session.run(
                     cypher,
                     from_entity=from_entity,
                     to_entity=to_entity
                 )
                 
-                record = result.single()
+                record = await result.single()
                 if not record:
                     evidence = await self._build_markdown_evidence([
                         {"name": from_entity},
@@ -1194,7 +1196,7 @@ Keep it under 200 words and professional."""
     
     async def _tool_graph_pattern(self, params: Dict) -> Dict:
         """Find entities matching a graph pattern using Neo4j"""
-        if not self.indexing_service.neo4j_driver:
+        if not self.indexing_service.neo4j_async_driver:
             return {"error": "Neo4j not available", "results": []}
         
         pattern_description = params["pattern_description"]
@@ -1225,11 +1227,11 @@ Keep it under 200 words and professional."""
         """
         
         try:
-            with self.indexing_service.neo4j_driver.session() as session:
-                result = session.run(cypher, min_connections=min_connections)
+            async with self.indexing_service.neo4j_async_driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
+                result = await session.run(cypher, min_connections=min_connections)
                 
                 matches = []
-                for record in result:
+                async for record in result:
                     matches.append({
                         "id": record["id"],
                         "name": record["name"],
@@ -1263,7 +1265,7 @@ Keep it under 200 words and professional."""
         document_ids: List[str] = None
     ) -> List[Dict[str, Any]]:
         """Query Neo4j with entity type and property filters, optionally filtered by document_ids"""
-        if not self.indexing_service.neo4j_driver:
+        if not self.indexing_service.neo4j_async_driver:
             return []
         
         # Map common entity type names to actual EntityType enum values
@@ -1341,11 +1343,11 @@ Keep it under 200 words and professional."""
         logger.info(f"Executing Neo4j query: {cypher}")
         
         try:
-            with self.indexing_service.neo4j_driver.session() as session:
-                result = session.run(cypher)
+            async with self.indexing_service.neo4j_async_driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
+                result = await session.run(cypher)
                 
                 entities = []
-                for record in result:
+                async for record in result:
                     props_str = record.get("properties", "")
                     try:
                         # Properties are stored as string, need to parse
@@ -1467,7 +1469,7 @@ Keep it under 200 words and professional."""
 
         if not available_props and graph_id and self.indexing_service.neo4j_driver:
             try:
-                with self.indexing_service.neo4j_driver.session() as session:
+                with self.indexing_service.neo4j_driver.session(fetch_size=settings.NEO4J_FETCH_SIZE) as session:
                     records = session.run(
                         """
                         MATCH (e:Entity {graphId: $graph_id})
@@ -2,12 +2,13 @@
 ADE (Agentic Document Extraction) service for LandingAI integration
 """
 import io
-import json
 import asyncio
 import os
 import mimetypes
 import zipfile
+import json
 import httpx
+import orjson
 from typing import Dict, Any, List, Optional
 from loguru import logger
 
@@ -16,6 +17,18 @@ from models.document import Document
 from services.markdown_analyzer import MarkdownSchemaAnalyzer
 
 
+def _pretty_json(obj: Any) -> bytes:
+    """Indented JSON for logs and /tmp dumps of API payloads.
+    
+    ADE responses are arbitrary JSON, and orjson rejects things like integers
+    wider than 64 bits, so fall back to the stdlib encoder rather than fail.
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    except TypeError:
+        return json.dumps(obj, indent=2, default=str).encode()
+
+
 class ExtractionService:
     """Handles document extraction using LandingAI ADE API.
     
@@ -135,7 +148,7 @@ class ExtractionService:
             # Log the generated schema
             logger.info("SCHEMA GENERATED:")
             logger.info(f"{'='*60}")
-            logger.info(json.dumps(schema, indent=2))
+            logger.info(_pretty_json(schema).decode())
             logger.info(f"{'='*60}")
             
             # Save schema to /tmp for inspection
@@ -143,14 +156,14 @@ class ExtractionService:
             timestamp = int(time.time())
             schema_file = f"/tmp/adaptive_schema_{timestamp}.json"
             try:
-                with open(schema_file, "w", encoding="utf-8") as sf:
-                    json.dump({
+                with open(schema_file, "wb") as sf:
+                    sf.write(_pretty_json({
                         "document_metadata": metadata,
                         "markdown_length": len(markdown),
                         "generated_schema": schema,
                         "timestamp": timestamp,
                         "method": "deterministic_analysis"
-                    }, sf, indent=2)
+                    }))
                 logger.info(f"Schema saved to: {schema_file}")
             except Exception as e:
                 logger.warning(f"Could not save schema: {e}")
@@ -408,12 +421,12 @@ class ExtractionService:
         logger.info(f"ADE EXTRACT - Using Model: {model}")
         logger.info("ADE EXTRACT - Using Schema:")
         logger.info(f"{'='*60}")
-        logger.info(json.dumps(used_schema, indent=2))
+        logger.info(_pretty_json(used_schema).decode())
         logger.info(f"{'='*60}")
         logger.info(f"Markdown input length: {len(markdown)} characters")
         
         data = {
-            "schema": json.dumps(used_schema),  # send schema as JSON string per docs
+            "schema": orjson.dumps(used_schema).decode(),  # send schema as JSON string per docs
             "markdown": markdown,
             "model": model  # Use the new extract model for better extraction
         }
@@ -425,7 +438,7 @@ class ExtractionService:
         logger.info(f"Extraction result keys: {list(result.keys())}")
         logger.info("Full extraction result:")
         logger.info(f"{'='*60}")
-        logger.info(json.dumps(result, indent=2))
+        logger.info(_pretty_json(result).decode())
         logger.info(f"{'='*60}")
         
         # Save extraction result to /tmp for inspection
@@ -433,13 +446,13 @@ class ExtractionService:
         timestamp = int(time.time())
         result_file = f"/tmp/ade_extract_result_{timestamp}.json"
         try:
-            with open(result_file, "w", encoding="utf-8") as rf:
-                json.dump({
+            with open(result_file, "wb") as rf:
+                rf.write(_pretty_json({
                     "schema_used": used_schema,
                     "markdown_length": len(markdown),
                     "extraction_result": result,
                     "timestamp": timestamp
-                }, rf, indent=2)
+                }))
             logger.info(f"Extraction result saved to: {result_file}")
         except Exception as e:
             logger.warning(f"Could not save extraction result: {e}")
@@ -1,16 +1,324 @@
 """
 Indexing service for Weaviate and Neo4j
 """
+import asyncio
+import functools
+import itertools
+import json
+import math
+import operator
+import re
+import threading
+from collections import defaultdict
+import ahocorasick
+import numpy as np
 import weaviate
-from neo4j import GraphDatabase
-from typing import List
+from weaviate.util import generate_uuid5
+from neo4j import AsyncGraphDatabase, GraphDatabase
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 from loguru import logger
-import json
+from pydantic import TypeAdapter, ValidationError
+import orjson
 
 from config import settings
-from models.entity import Entity
+from models.entity import Entity, EntityType
 from models.edge import Edge
 
+# Cap on concurrent entity write transactions
+NEO4J_WRITE_CONCURRENCY = 4
+
+MERGE_ENTITIES_CYPHER = """
+    UNWIND $rows AS row
+    MERGE (n:Entity {entityId: row.entityId})
+    SET n += row.props
+    RETURN count(n) AS written
+"""
+
+# Relationship types are interpolated into Cypher, so they must be plain identifiers
+_REL_TYPE_RE = re.compile(r"^[A-Z_][A-Z0-9_]{0,63}$")
+
+
+@functools.lru_cache(maxsize=128)
+def _edge_cypher(rel_type: str) -> str:
+    """UNWIND statement creating relationships of one type, validated and built once per type"""
+    # Neo4j requires relationship types to be identifiers, not parameters,
+    # so the type is checked before it is interpolated
+    if not _REL_TYPE_RE.fullmatch(rel_type):
+        raise ValueError(f"invalid relationship type {rel_type!r}")
+    return f"""
+        UNWIND $rows AS row
+        MATCH (a:Entity {{entityId: row.source}})
+        MATCH (b:Entity {{entityId: row.target}})
+        CREATE (a)-[r:{rel_type} {{
+            edgeId: row.edgeId,
+            graphId: row.graphId,
+            properties: row.properties
+        }}]->(b)
+    """
+
+
+NEO4J_SCHEMA_STATEMENTS = [
+    "CREATE INDEX entity_id_idx IF NOT EXISTS FOR (n:Entity) ON (n.entityId)",
+    "CREATE INDEX entity_graph_idx IF NOT EXISTS FOR (n:Entity) ON (n.graphId)",
+    # Chatbot graph tools look entities up by name; analytics scans by type
+    "CREATE INDEX entity_name_idx IF NOT EXISTS FOR (n:Entity) ON (n.name)",
+    "CREATE INDEX entity_type_idx IF NOT EXISTS FOR (n:Entity) ON (n.type)",
+]
+
+# Set once the Weaviate collections are known to exist in this process
+_weaviate_schema_ready = threading.Event()
+
+# Validates a whole list of entity dicts in one pydantic-core call
+_ENTITY_LIST_ADAPTER = TypeAdapter(List[Entity])
+
+# Entity lists longer than this are serialized off the event loop
+SERIALIZE_CHUNK_SIZE = 500
+
+# Document text chunking, in words
+TEXT_CHUNK_WORDS = 500
+TEXT_CHUNK_OVERLAP = 100
+_WORD_RE = re.compile(r"\S+")
+
+# Reads every field the indexers need in one C-level call per entity
+_entity_fields = operator.attrgetter(
+    "id", "type", "name", "document_id", "graph_id"
+)
+
+_edge_fields = operator.attrgetter(
+    "type", "source", "target", "id", "graph_id", "properties"
+)
+
+
+# Properties fetched by searches; anything else would only add payload on the wire
+ENTITY_RETURN_PROPERTIES = ["entityId", "name", "entityType", "properties", "citations"]
+CHUNK_RETURN_PROPERTIES = ["chunkId", "documentId", "content", "chunkIndex", "pageNumber", "filename", "entityRefs"]
+
+
+# Filter keys accepted by query_entities, mapped to FinancialEntity properties
+_ENTITY_FILTER_PROPERTIES = {
+    "entity_id": "entityId",
+    "entityId": "entityId",
+    "entity_type": "entityType",
+    "entityType": "entityType",
+    "type": "entityType",
+    "name": "name",
+    "document_id": "documentId",
+    "documentId": "documentId",
+    "graph_id": "graphId",
+    "graphId": "graphId",
+}
+
+
+def _translate_entity_filters(filters: Optional[dict]):
+    """Translate a query_entities filter dict into a Weaviate filter (or None)"""
+    if not filters:
+        return None
+    
+    Filter = weaviate.classes.query.Filter
+    clauses = []
+    for key, value in filters.items():
+        # Optional filters are commonly passed as None; they simply don't apply
+        if value is None:
+            continue
+        prop = _ENTITY_FILTER_PROPERTIES.get(key)
+        if prop is None:
+            logger.warning(f"Ignoring unsupported entity filter: {key}")
+            continue
+        if isinstance(value, (list, tuple, set)):
+            if not value:
+                continue
+            clauses.append(functools.reduce(
+                operator.or_, (Filter.by_property(prop).equal(v) for v in value)
+            ))
+        else:
+            clauses.append(Filter.by_property(prop).equal(value))
+    
+    return functools.reduce(operator.and_, clauses) if clauses else None
+
+
+def _parse_weaviate_url(url: Optional[str]) -> tuple:
+    """Split WEAVIATE_URL into (host, port); a bare host[:port] is accepted too"""
+    if not url:
+        return None, None
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    return parts.hostname, parts.port or 8080
+
+
+def _zero():
+    """Awaitable placeholder for a disabled backend"""
+    return asyncio.sleep(0, result=0)
+
+
+def _dumps(obj) -> str:
+    """JSON-encode to str with orjson, stringifying anything it can't encode natively"""
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str).decode()
+    except TypeError:
+        # orjson rejects integers wider than 64 bits (long account numbers
+        # parsed from tables); the stdlib encoder handles them
+        return json.dumps(obj, default=str)
+
+
+_loads = orjson.loads
+
+
+def _dumps_properties(properties: Optional[dict]) -> str:
+    """JSON-encode an entity/edge properties dict"""
+    try:
+        return _dumps(properties or {})
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Could not encode properties, storing them empty: {e}")
+        return "{}"
+
+
+def _build_entity_matcher(entities: Optional[List[Entity]]):
+    """Build an Aho-Corasick automaton over lowercased entity names"""
+    if not entities:
+        return None
+    
+    matcher = ahocorasick.Automaton()
+    for entity in entities:
+        if not entity.name:
+            continue
+        key = entity.name.lower()
+        # Several entities can share a name; keep every id under the key
+        if key in matcher:
+            matcher.get(key).append(entity.id)
+        else:
+            matcher.add_word(key, [entity.id])
+    
+    if len(matcher) == 0:
+        return None
+    matcher.make_automaton()
+    return matcher
+
+
+@functools.lru_cache(maxsize=1)
+def _get_embedding_model():
+    """Load the configured sentence-transformers model once"""
+    from sentence_transformers import SentenceTransformer
+    logger.info(f"Loading embedding model {settings.EMBEDDING_MODEL}")
+    return SentenceTransformer(settings.EMBEDDING_MODEL)
+
+
+def _embed(texts: List[str]) -> List[List[float]]:
+    """Embed texts client-side in batches with the configured model"""
+    vectors = _get_embedding_model().encode(
+        texts,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True
+    )
+    return vectors.tolist()
+
+
+def _vector_config():
+    """Vectorizer for new collections: self-provided when embedding client-side"""
+    if settings.EMBEDDING_MODEL:
+        return weaviate.classes.config.Configure.Vectors.self_provided()
+    return weaviate.classes.config.Configure.Vectors.text2vec_transformers()
+
+
+def _batched(iterable, size: int):
+    """Yield lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _near_query(collection, query: str, **kwargs):
+    """Run a semantic query, embedding it client-side when the collection is self-provided"""
+    if settings.EMBEDDING_MODEL:
+        return collection.query.near_vector(near_vector=_embed([query])[0], **kwargs)
+    return collection.query.near_text(query=query, **kwargs)
+
+
+def _dumps_citations(citations, cache: dict) -> str:
+    """
+    JSON-encode a citation list, dumping each Citation object only once.
+    
+    Entities from the same page/section often share Citation instances, so
+    model_dump() results are memoized by object identity for the batch.
+    """
+    dumped = []
+    for citation in citations or []:
+        data = cache.get(id(citation))
+        if data is None:
+            data = cache[id(citation)] = citation.model_dump()
+        dumped.append(data)
+    return _dumps(dumped)
+
+
+def _encode_entity_json(entities: List[Entity]) -> List[tuple]:
+    """JSON-encode (properties, citations) for a list of entities"""
+    citation_cache = {}
+    encoded = []
+    for entity in entities:
+        # One unencodable entity must not abort the whole batch
+        try:
+            citations_json = _dumps_citations(entity.citations, citation_cache)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not encode citations of entity {entity.id}, storing none: {e}")
+            citations_json = "[]"
+        encoded.append((_dumps_properties(entity.properties), citations_json))
+    return encoded
+
+
+async def _encode_entities(entities: List[Entity]) -> List[tuple]:
+    """
+    Encode the JSON fields of every entity once, for both Weaviate and Neo4j.
+    
+    Large lists are encoded in a worker thread so the event loop stays free;
+    orjson is fast enough that shipping entities to other processes would
+    cost more than the encoding itself.
+    """
+    if len(entities) <= SERIALIZE_CHUNK_SIZE:
+        return _encode_entity_json(entities)
+    return await asyncio.to_thread(_encode_entity_json, entities)
+
+
+def _entity_vectors(entities: List[Entity]) -> List[Optional[List[float]]]:
+    """Entity vectors, embedding client-side the ones without a precomputed embedding"""
+    vectors = [entity.embedding for entity in entities]
+    missing = [idx for idx, vector in enumerate(vectors) if vector is None]
+    if missing:
+        texts = [f"{entities[idx].type.value} {entities[idx].name}" for idx in missing]
+        for idx, vector in zip(missing, _embed(texts)):
+            vectors[idx] = vector
+    return vectors
+
+
+def _serialize_entities(
+    entities: List[Entity],
+    encoded: List[tuple],
+    vectors: Optional[List[Optional[List[float]]]] = None
+) -> list:
+    """
+    Build Weaviate data objects from entities and their pre-encoded JSON fields.
+    
+    Entities carrying a precomputed embedding (or a vector from `vectors`) send
+    it as the object vector, so Weaviate skips server-side vectorization for them.
+    """
+    if vectors is None:
+        vectors = [entity.embedding for entity in entities]
+    DataObject = weaviate.classes.data.DataObject
+    return [
+        DataObject(
+            properties={
+                "entityId": entity_id,
+                "entityType": entity_type.value,
+                "name": name,
+                "properties": properties_json,
+                "citations": citations_json,
+                "documentId": document_id,
+                "graphId": graph_id
+            },
+            vector=vector
+        )
+        for (entity_id, entity_type, name, document_id, graph_id), (properties_json, citations_json), vector
+        in zip(map(_entity_fields, entities), encoded, vectors)
+    ]
+
 
 class IndexingService:
     """Handles indexing entities and edges in vector and graph databases"""
@@ -18,21 +326,46 @@ class IndexingService:
     def __init__(self):
         # Defaults to None; attempt connections but don't fail startup
         self.weaviate_client = None
+        self._entity_collection = None
+        self._chunk_collection = None
+        # DocumentChunk collections created before entityRefs became TEXT_ARRAY
+        # still store it as a JSON-encoded string
+        self._chunk_refs_as_json = False
         self.neo4j_driver = None
+        self.neo4j_async_driver = None
         
+        # Parsed once; reconnect attempts in ensure_weaviate_client reuse it
+        self._weaviate_host, self._weaviate_port = _parse_weaviate_url(settings.WEAVIATE_URL)
         self._connect_weaviate()
         
-        # Neo4j driver (optional)
+        # Neo4j drivers (optional). The sync driver serves the chatbot/analytics
+        # read paths; indexing writes go through the async driver so they yield
+        # to the event loop during Bolt I/O.
         if getattr(settings, "ENABLE_NEO4J", False):
             try:
-                self.neo4j_driver = GraphDatabase.driver(
-                    settings.NEO4J_URI,
-                    auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
-                )
-                logger.info("Neo4j connected")
+                driver_config = {
+                    "auth": (settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+                    "max_connection_pool_size": settings.NEO4J_POOL_SIZE,
+                    "connection_acquisition_timeout": settings.NEO4J_ACQ_TIMEOUT,
+                    "max_connection_lifetime": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+                    "connection_timeout": settings.NEO4J_CONNECTION_TIMEOUT,
+                    "keep_alive": True,
+                }
+                self.neo4j_driver = GraphDatabase.driver(settings.NEO4J_URI, **driver_config)
+                self.neo4j_async_driver = AsyncGraphDatabase.driver(settings.NEO4J_URI, **driver_config)
             except Exception as e:
                 logger.warning(f"Neo4j not available: {e}")
                 self.neo4j_driver = None
+                self.neo4j_async_driver = None
+            else:
+                # Open the first pooled connection now rather than on the first
+                # request. Keep the drivers if Neo4j is still starting: they
+                # connect lazily once it is up.
+                try:
+                    self.neo4j_driver.verify_connectivity()
+                    logger.info("Neo4j connected")
+                except Exception as e:
+                    logger.warning(f"Neo4j not reachable yet: {e}")
         else:
             logger.info("Neo4j indexing disabled by config")
     
@@ -47,20 +380,7 @@ class IndexingService:
             return False
         
         try:
-            # Parse WEAVIATE_URL to extract host and port
-            url = settings.WEAVIATE_URL
-            if url.startswith("http://"):
-                url = url[7:]
-            elif url.startswith("https://"):
-                url = url[8:]
-            
-            # Extract host and port
-            if ":" in url:
-                host, port = url.split(":")
-                port = int(port)
-            else:
-                host = url
-                port = 8080
+            host, port = self._weaviate_host, self._weaviate_port
             
             # Connect to Weaviate
             auth = None
@@ -73,8 +393,10 @@ class IndexingService:
                 grpc_port=50051,
                 auth_credentials=auth
             )
+            # Collection handles are reused for every import and query
+            self._entity_collection = self.weaviate_client.collections.get("FinancialEntity")
+            self._chunk_collection = self.weaviate_client.collections.get("DocumentChunk")
             logger.info(f"Weaviate connected at {host}:{port}")
-            self._init_weaviate_schema()
             return True
         except Exception as e:
             logger.warning(f"Weaviate not available: {e}")
@@ -88,11 +410,37 @@ class IndexingService:
         """
         if self.weaviate_client:
             return True
-        return self._connect_weaviate()
+        if not self._connect_weaviate():
+            return False
+        # Late connection: startup schema init ran without a client
+        self._init_weaviate_schema()
+        return True
+    
+    def init_schema(self):
+        """Create missing collections and indexes; called once at application startup"""
+        self._init_weaviate_schema()
+        self._init_neo4j_schema()
+    
+    def _init_neo4j_schema(self):
+        """Create the Entity indexes used by MERGE and edge MATCH lookups"""
+        if not self.neo4j_driver:
+            return
+        
+        try:
+            with self.neo4j_driver.session() as session:
+                for statement in NEO4J_SCHEMA_STATEMENTS:
+                    session.run(statement).consume()
+            logger.info("Neo4j Entity indexes ensured")
+        except Exception as e:
+            logger.error(f"Error initializing Neo4j schema: {e}")
+    
+    def _neo4j_session(self):
+        """Open an async Neo4j session for indexing writes"""
+        return self.neo4j_async_driver.session(database=settings.NEO4J_DATABASE)
     
     def _init_weaviate_schema(self):
         """Initialize Weaviate schema for entities and document chunks"""
-        if not self.weaviate_client:
+        if not self.weaviate_client or _weaviate_schema_ready.is_set():
             return
         
         # Weaviate v4 uses collections API
@@ -106,12 +454,26 @@ class IndexingService:
             # Check if DocumentChunk collection exists
             if self.weaviate_client.collections.exists("DocumentChunk"):
                 logger.info("DocumentChunk collection already exists")
+                self._detect_legacy_entity_refs()
             else:
                 self._create_document_chunk_collection()
-                
+            
+            _weaviate_schema_ready.set()
         except Exception as e:
             logger.error(f"Error initializing Weaviate schema: {e}")
     
+    def _detect_legacy_entity_refs(self):
+        """Fall back to JSON-encoded entityRefs if the existing collection stores them as TEXT"""
+        config = self.weaviate_client.collections.get("DocumentChunk").config.get()
+        for prop in config.properties:
+            if prop.name == "entityRefs":
+                self._chunk_refs_as_json = prop.data_type == weaviate.classes.config.DataType.TEXT
+                break
+        if self._chunk_refs_as_json:
+            logger.warning(
+                "DocumentChunk.entityRefs is TEXT; recreate the collection to store it as TEXT_ARRAY"
+            )
+    
     def _create_entity_collection(self):
         """Create FinancialEntity collection"""
         if not self.weaviate_client:
@@ -121,7 +483,7 @@ class IndexingService:
         collection = self.weaviate_client.collections.create(
             name="FinancialEntity",
             description="Financial entities from documents",
-            vector_config=weaviate.classes.config.Configure.Vectors.text2vec_transformers(),
+            vector_config=_vector_config(),
             properties=[
                 weaviate.classes.config.Property(
                     name="entityId",
@@ -167,7 +529,7 @@ class IndexingService:
         collection = self.weaviate_client.collections.create(
             name="DocumentChunk",
             description="Document text chunks for semantic search",
-            vector_config=weaviate.classes.config.Configure.Vectors.text2vec_transformers(),
+            vector_config=_vector_config(),
             properties=[
                 weaviate.classes.config.Property(
                     name="chunkId",
@@ -201,14 +563,14 @@ class IndexingService:
                 ),
                 weaviate.classes.config.Property(
                     name="entityRefs",
-                    data_type=weaviate.classes.config.DataType.TEXT,
-                    description="JSON array of entity IDs in this chunk"
+                    data_type=weaviate.classes.config.DataType.TEXT_ARRAY,
+                    description="IDs of entities mentioned in this chunk"
                 )
             ]
         )
         logger.info("DocumentChunk collection created successfully")
     
-    async def index_entities(self, entities: List[Entity]) -> dict:
+    async def index_entities(self, entities: Union[List[Entity], List[dict]]) -> dict:
         """
         Index entities in Weaviate and Neo4j
         
@@ -228,32 +590,26 @@ class IndexingService:
         logger.info(f"Indexing {len(entities)} entities")
         
         # Check if entities are Entity objects or dicts
-        if entities and isinstance(entities[0], dict):
+        if isinstance(entities[0], dict):
             logger.info("Entities are dicts, converting to Entity objects")
-            from models.entity import Entity, EntityType
-            entity_objects = []
-            for e_dict in entities:
-                try:
-                    entity = Entity(
-                        id=e_dict.get("id", ""),
-                        type=EntityType(e_dict.get("type", "")),
-                        name=e_dict.get("name", ""),
-                        properties=e_dict.get("properties", {}),
-                        document_id=e_dict.get("document_id", ""),
-                        graph_id=e_dict.get("graph_id", "")
-                    )
-                    entity_objects.append(entity)
-                except Exception as e:
-                    logger.warning(f"Failed to convert entity dict to Entity object: {e}")
-            entities = entity_objects
+            try:
+                entities = _ENTITY_LIST_ADAPTER.validate_python(entities)
+            except ValidationError as e:
+                logger.warning(
+                    f"Bulk entity validation failed ({e.error_count()} errors), converting individually"
+                )
+                entities = self._convert_entity_dicts(entities)
         
-        weaviate_count = 0
-        if self.ensure_weaviate_client():
-            weaviate_count = await self._index_to_weaviate(entities)
+        weaviate_enabled = self.ensure_weaviate_client()
+        neo4j_enabled = self.neo4j_async_driver is not None
+        # Both stores persist the same JSON strings; encode them once
+        encoded = await _encode_entities(entities) if (weaviate_enabled or neo4j_enabled) else []
         
-        neo4j_count = 0
-        if self.neo4j_driver:
-            neo4j_count = await self._index_to_neo4j(entities)
+        # The two stores are independent, so write to both concurrently
+        weaviate_count, neo4j_count = await asyncio.gather(
+            self._index_to_weaviate(entities, encoded) if weaviate_enabled else _zero(),
+            self._index_to_neo4j(entities, encoded) if neo4j_enabled else _zero()
+        )
         
         logger.info(f"Indexing complete: {weaviate_count} to Weaviate, {neo4j_count} to Neo4j")
         
@@ -262,6 +618,24 @@ class IndexingService:
             "neo4j": {"nodes_count": neo4j_count}
         }
     
+    def _convert_entity_dicts(self, entity_dicts: List[dict]) -> List[Entity]:
+        """Convert entity dicts one at a time, skipping any that fail validation"""
+        entity_objects = []
+        for e_dict in entity_dicts:
+            try:
+                entity = Entity(
+                    id=e_dict.get("id", ""),
+                    type=EntityType(e_dict.get("type", "")),
+                    name=e_dict.get("name", ""),
+                    properties=e_dict.get("properties", {}),
+                    document_id=e_dict.get("document_id", ""),
+                    graph_id=e_dict.get("graph_id", "")
+                )
+                entity_objects.append(entity)
+            except Exception as e:
+                logger.warning(f"Failed to convert entity dict to Entity object: {e}")
+        return entity_objects
+    
     async def index_document_text(self, document_id: str, markdown: str, filename: str, entities: List[Entity] = None, total_pages: int = None) -> dict:
         """
         Chunk and index full document text for semantic search
@@ -281,53 +655,10 @@ class IndexingService:
             return {"chunks_indexed": 0}
         
         try:
-            chunks = self._chunk_text(markdown)
-            logger.info(f"Created {len(chunks)} chunks from document {document_id}")
-            
-            collection = self.weaviate_client.collections.get("DocumentChunk")
-            
-            # Calculate page numbers more accurately
-            # If total_pages is provided, distribute chunks evenly across pages
-            # Otherwise, estimate 2 chunks per page and cap at a reasonable maximum
-            if total_pages and total_pages > 0:
-                # Distribute chunks evenly across actual pages
-                chunks_per_page = max(1, len(chunks) / total_pages)
-            else:
-                # Fallback: estimate 2 chunks per page
-                chunks_per_page = 2.0
-                total_pages = max(1, (len(chunks) + 1) // 2)  # Estimate total pages
-            
-            indexed_count = 0
-            with collection.batch.fixed_size(batch_size=50) as batch:
-                for idx, chunk in enumerate(chunks):
-                    # Find entities mentioned in this chunk
-                    entity_refs = []
-                    if entities:
-                        for entity in entities:
-                            if entity.name and entity.name.lower() in chunk.lower():
-                                entity_refs.append(entity.id)
-                    
-                    chunk_id = f"{document_id}_chunk_{idx}"
-                    
-                    # Calculate page number: distribute chunks across pages
-                    # Page numbers are 1-indexed, so add 1
-                    estimated_page = int(idx / chunks_per_page) + 1
-                    # Cap at total_pages to prevent invalid page numbers
-                    page_number = min(estimated_page, total_pages) if total_pages else estimated_page
-                    
-                    data_object = {
-                        "chunkId": chunk_id,
-                        "documentId": document_id,
-                        "content": chunk,
-                        "chunkIndex": idx,
-                        "pageNumber": page_number,
-                        "filename": filename,
-                        "entityRefs": json.dumps(entity_refs)
-                    }
-                    
-                    batch.add_object(data_object)
-                    indexed_count += 1
-            
+            # Chunking and the batched upload are blocking; keep them off the event loop
+            indexed_count = await asyncio.to_thread(
+                self._write_chunks, [(document_id, markdown, filename, entities, total_pages)]
+            )
             logger.info(f"Indexed {indexed_count} document chunks to Weaviate")
             return {"chunks_indexed": indexed_count}
             
@@ -335,36 +666,153 @@ class IndexingService:
             logger.error(f"Error indexing document text: {e}")
             return {"chunks_indexed": 0, "error": str(e)}
     
-    def _chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 100) -> List[str]:
+    async def batch_index_documents(
+        self,
+        docs: List[Tuple[str, str, str, Optional[List[Entity]], Optional[int]]]
+    ) -> dict:
         """
-        Split text into overlapping chunks by words
+        Chunk and index several documents through a single Weaviate batch
         
         Args:
-            text: Text to chunk
-            chunk_size: Target chunk size in words
-            overlap: Number of overlapping words between chunks
+            docs: (document_id, markdown, filename, entities, total_pages) per
+                document, as accepted by index_document_text
             
         Returns:
-            List of text chunks
+            dict: Indexing statistics
         """
-        words = text.split()
-        chunks = []
-        
-        i = 0
-        while i < len(words):
-            # Take chunk_size words
-            chunk_words = words[i:i + chunk_size]
-            chunk = ' '.join(chunk_words)
-            chunks.append(chunk)
-            
-            # Move forward by (chunk_size - overlap)
-            i += (chunk_size - overlap)
+        if not self.ensure_weaviate_client():
+            logger.warning("Weaviate not enabled, skipping document text indexing")
+            return {"chunks_indexed": 0, "documents_indexed": 0}
+        
+        try:
+            # One batch context for all documents: its sender threads start once
+            indexed_count = await asyncio.to_thread(self._write_chunks, docs)
+            logger.info(f"Indexed {indexed_count} document chunks from {len(docs)} documents to Weaviate")
+            return {"chunks_indexed": indexed_count, "documents_indexed": len(docs)}
             
-            # Stop if we're at the end
-            if i >= len(words):
-                break
+        except Exception as e:
+            logger.error(f"Error batch indexing document text: {e}")
+            return {"chunks_indexed": 0, "documents_indexed": 0, "error": str(e)}
+    
+    def _write_chunks(self, docs) -> int:
+        """Write the chunks of every document through one Weaviate batch; returns the number indexed"""
+        # A handle of our own: batch state (and failed_objects) lives on the
+        # handle, and concurrent calls must not see each other's batches
+        collection = self.weaviate_client.collections.get("DocumentChunk")
+        
+        indexed_count = 0
+        with self._weaviate_batch(collection) as batch:
+            for doc in docs:
+                for properties, uuid, vector in self._prepare_chunks(*doc):
+                    batch.add_object(properties=properties, uuid=uuid, vector=vector)
+                    indexed_count += 1
         
-        return chunks
+        failed = len(collection.batch.failed_objects)
+        if failed:
+            logger.warning(f"{failed} document chunks failed to index to Weaviate")
+        return indexed_count - failed
+    
+    def _prepare_chunks(
+        self,
+        document_id: str,
+        markdown: str,
+        filename: str,
+        entities: Optional[List[Entity]] = None,
+        total_pages: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """Chunk a document, yielding (properties, uuid, vector) for each chunk"""
+        spans = self._word_spans(markdown)
+        total_chunks = self._count_chunks(len(spans))
+        logger.info(f"Created {total_chunks} chunks from document {document_id}")
+        
+        page_numbers = self._page_numbers(total_chunks, total_pages)
+        
+        # One pass per chunk finds every entity name it mentions
+        matcher = _build_entity_matcher(entities)
+        
+        embed = bool(settings.EMBEDDING_MODEL)
+        # Chunks are embedded a group at a time so the model sees full batches
+        for group in _batched(enumerate(self._iter_chunks(markdown, spans)), settings.EMBEDDING_BATCH_SIZE):
+            vectors = _embed([chunk for _, chunk in group]) if embed else [None] * len(group)
+            for (idx, chunk), vector in zip(group, vectors):
+                # Find entities mentioned in this chunk
+                entity_refs = []
+                if matcher is not None:
+                    entity_refs = list(dict.fromkeys(
+                        entity_id
+                        for _, entity_ids in matcher.iter(chunk.lower())
+                        for entity_id in entity_ids
+                    ))
+                
+                chunk_id = f"{document_id}_chunk_{idx}"
+                
+                data_object = {
+                    "chunkId": chunk_id,
+                    "documentId": document_id,
+                    "content": chunk,
+                    "chunkIndex": idx,
+                    "pageNumber": page_numbers[idx],
+                    "filename": filename,
+                    "entityRefs": _dumps(entity_refs) if self._chunk_refs_as_json else entity_refs
+                }
+                
+                # Deterministic UUIDs make re-indexing and batch retries upserts, not duplicates
+                yield data_object, generate_uuid5(chunk_id), vector
+    
+    @staticmethod
+    def _page_numbers(total_chunks: int, total_pages: Optional[int]) -> List[int]:
+        """Estimated 1-indexed page number of every chunk, computed in one vectorized pass"""
+        # If total_pages is provided, distribute chunks evenly across pages
+        # Otherwise, estimate 2 chunks per page and cap at a reasonable maximum
+        if total_pages and total_pages > 0:
+            # Distribute chunks evenly across actual pages
+            chunks_per_page = max(1, total_chunks / total_pages)
+        else:
+            # Fallback: estimate 2 chunks per page
+            chunks_per_page = 2.0
+            total_pages = max(1, (total_chunks + 1) // 2)  # Estimate total pages
+        
+        # Page numbers are 1-indexed; cap at total_pages to prevent invalid page numbers
+        pages = (np.arange(total_chunks) / chunks_per_page).astype(np.int64) + 1
+        return np.minimum(pages, total_pages).tolist()
+    
+    @staticmethod
+    def _count_chunks(word_count: int, chunk_size: int = TEXT_CHUNK_WORDS, overlap: int = TEXT_CHUNK_OVERLAP) -> int:
+        """Number of chunks _iter_chunks yields for a text of word_count words"""
+        if word_count <= 0:
+            return 0
+        return math.ceil(word_count / (chunk_size - overlap))
+    
+    @staticmethod
+    def _word_spans(text: str) -> List[tuple]:
+        """(start, end) offsets of every whitespace-delimited word in text"""
+        return [match.span() for match in _WORD_RE.finditer(text)]
+    
+    @staticmethod
+    def _iter_chunks(
+        text: str,
+        spans: List[tuple],
+        chunk_size: int = TEXT_CHUNK_WORDS,
+        overlap: int = TEXT_CHUNK_OVERLAP
+    ) -> Iterator[str]:
+        """
+        Lazily split text into overlapping chunks by words
+        
+        Args:
+            text: Text to chunk
+            spans: Word offsets from _word_spans(text)
+            chunk_size: Target chunk size in words
+            overlap: Number of overlapping words between chunks
+            
+        Yields:
+            Text chunks, one at a time
+        """
+        word_count = len(spans)
+        # Move forward by (chunk_size - overlap) until we're past the end,
+        # slicing the original text rather than re-joining words
+        for i in range(0, word_count, chunk_size - overlap):
+            last = min(i + chunk_size, word_count) - 1
+            yield text[spans[i][0]:spans[last][1]]
     
     async def search_document_chunks(self, query: str, limit: int = 5) -> List[dict]:
         """
@@ -381,16 +829,21 @@ class IndexingService:
             return []
         
         try:
-            collection = self.weaviate_client.collections.get("DocumentChunk")
+            collection = self._chunk_collection
             
-            response = collection.query.near_text(
-                query=query,
+            response = await asyncio.to_thread(
+                _near_query,
+                collection,
+                query,
                 limit=limit,
-                return_properties=["chunkId", "documentId", "content", "chunkIndex", "pageNumber", "filename", "entityRefs"]
+                return_properties=CHUNK_RETURN_PROPERTIES
             )
             
             results = []
             for obj in response.objects:
+                entity_refs = obj.properties.get("entityRefs") or []
+                if isinstance(entity_refs, str):
+                    entity_refs = _loads(entity_refs)
                 results.append({
                     "chunk_id": obj.properties.get("chunkId"),
                     "document_id": obj.properties.get("documentId"),
@@ -398,7 +851,7 @@ class IndexingService:
                     "chunk_index": obj.properties.get("chunkIndex"),
                     "page_number": obj.properties.get("pageNumber"),
                     "filename": obj.properties.get("filename"),
-                    "entity_refs": json.loads(obj.properties.get("entityRefs", "[]")),
+                    "entity_refs": entity_refs,
                     "score": obj.metadata.certainty if hasattr(obj.metadata, 'certainty') else None
                 })
             
@@ -418,125 +871,161 @@ class IndexingService:
         Returns:
             dict: Indexing statistics
         """
-        if not self.neo4j_driver:
+        if not self.neo4j_async_driver:
             logger.warning("Neo4j not available, skipping edge indexing")
             return {"neo4j": {"relationships_count": 0}}
         
         logger.info(f"Indexing {len(edges)} edges")
         
-        with self.neo4j_driver.session() as session:
-            for edge in edges:
-                # Use actual relationship type from EdgeType enum
-                rel_type = edge.type.value if hasattr(edge.type, 'value') else str(edge.type)
-                
-                # Build dynamic Cypher with proper relationship type
-                # Neo4j requires relationship types to be identifiers, not parameters
-                cypher = f"""
-                    MATCH (a {{entityId: $source}})
-                    MATCH (b {{entityId: $target}})
-                    CREATE (a)-[r:{rel_type} {{
-                        edgeId: $edgeId,
-                        graphId: $graphId,
-                        properties: $properties
-                    }}]->(b)
-                """
-                
-                # Convert properties dict to JSON string for Neo4j
-                props_json = json.dumps(edge.properties) if edge.properties else "{}"
-                
-                session.run(
-                    cypher,
-                    source=edge.source,
-                    target=edge.target,
-                    edgeId=edge.id,
-                    graphId=edge.graph_id,
-                    properties=props_json
-                )
-                
-                logger.debug(f"Indexed {rel_type} relationship: {edge.source} -> {edge.target}")
+        # Build every row (properties included) in one pass before opening the
+        # session, grouped by relationship type: each type becomes one UNWIND statement
+        groups = defaultdict(list)
+        for edge_type, source, target, edge_id, graph_id, properties in map(_edge_fields, edges):
+            # Use actual relationship type from EdgeType enum
+            rel_type = edge_type.value if hasattr(edge_type, 'value') else str(edge_type)
+            groups[rel_type].append({
+                "source": source,
+                "target": target,
+                "edgeId": edge_id,
+                "graphId": graph_id,
+                "properties": _dumps_properties(properties)
+            })
         
-        logger.info(f"Indexed {len(edges)} relationships to Neo4j with proper types")
-        return {"neo4j": {"relationships_count": len(edges)}}
+        # One managed transaction (and one commit) per batch of same-typed edges
+        created = 0
+        async with self._neo4j_session() as session:
+            for rel_type, rows in groups.items():
+                # Validated once per type; the statement text is cached so the
+                # server's query-plan cache sees the same string every time
+                try:
+                    cypher = _edge_cypher(rel_type)
+                except ValueError as e:
+                    logger.warning(f"Skipping {len(rows)} edge(s): {e}")
+                    continue
+                for i in range(0, len(rows), settings.NEO4J_WRITE_BATCH_SIZE):
+                    created += await session.execute_write(
+                        self._create_edges_tx, cypher, rows[i:i + settings.NEO4J_WRITE_BATCH_SIZE]
+                    )
+        
+        if created < len(edges):
+            logger.warning(f"{len(edges) - created} edges skipped (invalid type or endpoint entities not found)")
+        logger.info(f"Indexed {created} relationships to Neo4j with proper types")
+        return {"neo4j": {"relationships_count": created}}
+    
+    @staticmethod
+    async def _create_edges_tx(tx, cypher: str, rows: List[dict]) -> int:
+        """Transaction function: create one batch of same-typed relationships, returning how many were created"""
+        result = await tx.run(cypher, rows=rows)
+        # Write-only statement: discard the stream and keep the counters
+        summary = await result.consume()
+        return summary.counters.relationships_created
     
-    async def _index_to_weaviate(self, entities: List[Entity]) -> int:
+    async def _index_to_weaviate(self, entities: List[Entity], encoded: List[tuple]) -> int:
         """Index entities to Weaviate"""
-        import json
-        
         try:
-            collection = self.weaviate_client.collections.get("FinancialEntity")
-            
-            with collection.batch.fixed_size(batch_size=100) as batch:
-                for entity in entities:
-                    data_object = {
-                        "entityId": entity.id,
-                        "entityType": entity.type.value,
-                        "name": entity.name,
-                        "properties": json.dumps(entity.properties),
-                        "citations": json.dumps([c.model_dump() for c in entity.citations]),
-                        "documentId": entity.document_id,
-                        "graphId": entity.graph_id
-                    }
-                    
-                    batch.add_object(data_object)
+            vectors = None
+            if settings.EMBEDDING_MODEL:
+                vectors = await asyncio.to_thread(_entity_vectors, entities)
+            data_objects = _serialize_entities(entities, encoded, vectors)
+            # The Weaviate client is blocking; run it on a worker thread so the
+            # Neo4j writes gathered alongside this call proceed in parallel
+            if len(data_objects) <= settings.WEAVIATE_BATCH_SIZE:
+                # Fits in one request: a single insert_many call avoids
+                # starting the batcher's background sender
+                response = await asyncio.to_thread(
+                    self._entity_collection.data.insert_many, data_objects
+                )
+                failed = len(response.errors)
+            else:
+                failed = await asyncio.to_thread(self._batch_entities_to_weaviate, data_objects)
             
-            logger.info(f"Indexed {len(entities)} entities to Weaviate")
-            return len(entities)
+            if failed:
+                logger.warning(f"{failed} entities failed to index to Weaviate")
+            indexed = len(entities) - failed
+            logger.info(f"Indexed {indexed} entities to Weaviate")
+            return indexed
         except Exception as e:
             logger.error(f"Error indexing to Weaviate: {e}")
             return 0
     
-    async def _index_to_neo4j(self, entities: List[Entity]) -> int:
-        """Index entities as nodes in Neo4j"""
+    def _batch_entities_to_weaviate(self, data_objects: list) -> int:
+        """Stream data objects through the Weaviate batcher; returns the number of failed objects"""
+        # A handle of our own, as in _write_chunks, so the failures read below
+        # are this batch's and not those of a concurrent index_entities call
+        collection = self.weaviate_client.collections.get("FinancialEntity")
+        with self._weaviate_batch(collection) as batch:
+            for data_object in data_objects:
+                batch.add_object(properties=data_object.properties, vector=data_object.vector)
+        
+        return len(collection.batch.failed_objects)
+    
+    @staticmethod
+    def _weaviate_batch(collection):
+        """Open a batch context on a collection according to the batching settings"""
+        if settings.WEAVIATE_DYNAMIC_BATCHING:
+            # Server-driven sizing backs off when the vectorizer queue fills up
+            return collection.batch.dynamic()
+        return collection.batch.fixed_size(
+            batch_size=settings.WEAVIATE_BATCH_SIZE,
+            concurrent_requests=settings.WEAVIATE_CONCURRENCY
+        )
+    
+    async def _index_to_neo4j(self, entities: List[Entity], encoded: List[tuple]) -> int:
+        """Index entities as nodes in Neo4j using batched UNWIND writes"""
         if not entities:
             logger.warning("No entities to index to Neo4j")
             return 0
-            
-        try:
-            import json
-
-            with self.neo4j_driver.session() as session:
-                # Use MERGE to avoid duplicates, and commit transaction
-                indexed = 0
-                for entity in entities:
-                    result = session.run(
-                        """
-                        MERGE (n:Entity {entityId: $entityId})
-                        ON CREATE SET 
-                            n.type = $type,
-                            n.name = $name,
-                            n.properties = $properties,
-                            n.documentId = $documentId,
-                            n.graphId = $graphId,
-                            n.citations = $citations
-                        ON MATCH SET
-                            n.type = $type,
-                            n.name = $name,
-                            n.properties = $properties,
-                            n.documentId = $documentId,
-                            n.graphId = $graphId,
-                            n.citations = $citations
-                        RETURN n
-                        """,
-                        entityId=entity.id,
-                        type=entity.type.value,
-                        name=entity.name,
-                        properties=json.dumps(entity.properties or {}),
-                        documentId=entity.document_id,
-                        graphId=entity.graph_id,
-                        citations=json.dumps([c.model_dump() for c in entity.citations] if entity.citations else [])
-                    )
-                    # Consume result to ensure query executes
-                    result.consume()
-                    indexed += 1
-                
-                # Commit the transaction
-                session.close()
-            
-            logger.info(f"Indexed {indexed} entities to Neo4j")
-            return indexed
-        except Exception as e:
-            logger.error(f"Error indexing to Neo4j: {e}", exc_info=True)
-            return 0
+        
+        rows = [
+            {
+                "entityId": entity_id,
+                "props": {
+                    "type": entity_type.value,
+                    "name": name,
+                    "properties": properties_json,
+                    "documentId": document_id,
+                    "graphId": graph_id,
+                    "citations": citations_json
+                }
+            }
+            for (entity_id, entity_type, name, document_id, graph_id), (properties_json, citations_json)
+            in zip(map(_entity_fields, entities), encoded)
+        ]
+        batch_size = settings.NEO4J_WRITE_BATCH_SIZE
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        semaphore = asyncio.Semaphore(NEO4J_WRITE_CONCURRENCY)
+        
+        async def write_batch(batch: List[dict]) -> int:
+            async with semaphore:
+                async with self._neo4j_session() as session:
+                    return await session.execute_write(self._merge_entities_tx, batch)
+        
+        # Each batch commits in its own transaction, so a failed batch must not
+        # hide the ones already written: count what succeeded, log the rest
+        results = await asyncio.gather(*(write_batch(batch) for batch in batches), return_exceptions=True)
+        indexed = 0
+        failed = 0
+        for batch_idx, result in enumerate(results):
+            if isinstance(result, BaseException):
+                failed += 1
+                logger.error(
+                    f"Error indexing batch {batch_idx + 1}/{len(batches)} ({len(batches[batch_idx])} entities) to Neo4j: {result}"
+                )
+            else:
+                indexed += result
+        
+        if failed:
+            logger.warning(f"Indexed {indexed} entities to Neo4j; {failed} of {len(batches)} batch(es) failed")
+        else:
+            logger.info(f"Indexed {indexed} entities to Neo4j in {len(batches)} batch(es)")
+        return indexed
+    
+    @staticmethod
+    async def _merge_entities_tx(tx, rows: List[dict]) -> int:
+        """Transaction function: MERGE one batch of entity rows, returning the rows written"""
+        result = await tx.run(MERGE_ENTITIES_CYPHER, rows=rows)
+        record = await result.single()
+        return record["written"] if record else 0
     
     async def query_entities(
         self,
@@ -550,7 +1039,9 @@ class IndexingService:
         Args:
             query_text: Search query
             limit: Max results
-            filters: Additional filters
+            filters: Property filters applied server-side, e.g.
+                {"entity_type": "Loan", "graph_id": "graph_xyz"}; a list value
+                matches any of its items
             
         Returns:
             List of matching entities
@@ -559,11 +1050,16 @@ class IndexingService:
             return []
         
         try:
-            collection = self.weaviate_client.collections.get("FinancialEntity")
+            collection = self._entity_collection
             
-            result = collection.query.near_text(
-                query=query_text,
-                limit=limit
+            # The query is a blocking gRPC call; run it off the event loop
+            result = await asyncio.to_thread(
+                _near_query,
+                collection,
+                query_text,
+                limit=limit,
+                filters=_translate_entity_filters(filters),
+                return_properties=ENTITY_RETURN_PROPERTIES
             )
             
             entities = []
@@ -582,15 +1078,45 @@ class IndexingService:
             logger.error(f"Error querying Weaviate: {e}")
             return []
     
-    def __del__(self):
-        """Close connections"""
+    async def close(self):
+        """Close database connections; safe to call more than once"""
         try:
-            if getattr(self, "weaviate_client", None):
+            if self.weaviate_client:
                 self.weaviate_client.close()
-        except Exception:
-            pass
-        try:
-            if getattr(self, "neo4j_driver", None):
-                self.neo4j_driver.close()
-        except Exception:
-            pass
+        except Exception as e:
+            logger.warning(f"Error closing Weaviate client: {e}")
+        finally:
+            self.weaviate_client = None
+            self._entity_collection = None
+            self._chunk_collection = None
+        
+        for driver in (self.neo4j_async_driver, self.neo4j_driver):
+            if driver is None:
+                continue
+            try:
+                result = driver.close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Error closing Neo4j driver: {e}")
+        self.neo4j_driver = None
+        self.neo4j_async_driver = None
+    
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+
+
+@functools.lru_cache(maxsize=1)
+def get_indexing_service() -> IndexingService:
+    """
+    Return the process-wide IndexingService.
+    
+    Sharing one instance keeps the Weaviate gRPC channel and the Neo4j
+    connection pools warm instead of reconnecting per caller.
+    """
+    return IndexingService()
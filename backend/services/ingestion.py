@@ -5,14 +5,43 @@ import os
 import mimetypes
 import uuid
 from pathlib import Path
-from typing import BinaryIO
 from datetime import datetime
 
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+
 from models.document import Document, DocumentStatus
 from config import settings
 from loguru import logger
 
 
+# Uploads are read and written in chunks of this many bytes
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+# MIME types accepted for upload
+SUPPORTED_MIME_TYPES = frozenset({
+    # Documents
+    "application/pdf",
+    "application/msword",  # .doc
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
+    "application/vnd.ms-powerpoint",  # .ppt
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # .pptx
+    "application/vnd.oasis.opendocument.text",  # .odt
+    "application/vnd.oasis.opendocument.presentation",  # .odp
+    # Images
+    "image/jpeg",
+    "image/png",
+    # Archives
+    "application/zip",
+    "application/x-zip-compressed",
+    # Optional tabular types if needed later
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "text/csv",
+})
+
+
 class IngestionService:
     """Handles document upload and validation"""
     
@@ -22,7 +51,7 @@ class IngestionService:
     
     async def ingest_document(
         self,
-        file: BinaryIO,
+        file: UploadFile,
         filename: str,
         mime_type: str
     ) -> Document:
@@ -30,7 +59,7 @@ class IngestionService:
         Ingest a document file
         
         Args:
-            file: File binary stream
+            file: Uploaded file (read asynchronously)
             filename: Original filename
             mime_type: MIME type of the file
             
@@ -48,21 +77,34 @@ class IngestionService:
         file_extension = Path(filename).suffix
         safe_filename = f"{doc_id}{file_extension}"
         file_path = self.upload_dir / safe_filename
+        # Written under a temporary name and renamed into place once complete,
+        # so readers never see a half-written upload. The leading dot keeps it
+        # out of get_document's "{doc_id}.*" lookup meanwhile.
+        part_path = self.upload_dir / f".{safe_filename}.part"
         
-        # Write file to disk
+        # Stream the upload to disk one chunk at a time, rejecting it as soon
+        # as it crosses the size limit instead of buffering it whole first.
+        # Reads and writes are awaited so other requests run meanwhile.
         file_size = 0
-        with open(file_path, "wb") as f:
-            content = file.read()
-            file_size = len(content)
-            
-            # Check file size
-            if file_size > settings.MAX_UPLOAD_SIZE:
-                raise ValueError(
-                    f"File too large: {file_size} bytes "
-                    f"(max: {settings.MAX_UPLOAD_SIZE})"
-                )
+        try:
+            async with aiofiles.open(part_path, "wb", buffering=UPLOAD_CHUNK_SIZE) as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    
+                    # Check file size
+                    if file_size > settings.MAX_UPLOAD_SIZE:
+                        raise ValueError(
+                            f"File too large: over {file_size} bytes received "
+                            f"(max: {settings.MAX_UPLOAD_SIZE})"
+                        )
+                    
+                    await f.write(chunk)
             
-            f.write(content)
+            await aiofiles.os.replace(part_path, file_path)
+        except Exception:
+            # Don't leave a truncated upload behind
+            part_path.unlink(missing_ok=True)
+            raise
         
         logger.info(f"Ingested document: {doc_id} ({filename}, {file_size} bytes)")
         
@@ -81,27 +123,7 @@ class IngestionService:
     
     def _is_valid_file_type(self, mime_type: str) -> bool:
         """Check if file type is supported"""
-        valid_types = [
-            # Documents
-            "application/pdf",
-            "application/msword",  # .doc
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
-            "application/vnd.ms-powerpoint",  # .ppt
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # .pptx
-            "application/vnd.oasis.opendocument.text",  # .odt
-            "application/vnd.oasis.opendocument.presentation",  # .odp
-            # Images
-            "image/jpeg",
-            "image/png",
-            # Archives
-            "application/zip",
-            "application/x-zip-compressed",
-            # Optional tabular types if needed later
-            "application/vnd.ms-excel",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "text/csv",
-        ]
-        return mime_type in valid_types
+        return mime_type in SUPPORTED_MIME_TYPES
     
     async def get_document(self, document_id: str) -> Document | None:
         """
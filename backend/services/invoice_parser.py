@@ -3,13 +3,91 @@ Deterministic invoice parser
 Extracts structured data from invoice documents
 """
 import re
-import uuid
-from typing import Dict, Any, List
-from bs4 import BeautifulSoup
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from selectolax.lexbor import LexborHTMLParser, LexborNode as Node
 from loguru import logger
 
 from models.entity import Entity, EntityType
 from models.citation import Citation
+from services.text_utils import MARKUP_RE, lower_ascii, match_original, new_entity_ids
+
+
+# Compiled once at import; every invoice parse reuses them.
+# Keyword patterns are written in lower case and run against the lowered text
+# (see lower_ascii) instead of paying for re.IGNORECASE on every match attempt.
+_INVOICE_NUMBER_PATTERNS = [re.compile(p) for p in (
+    r'invoice\s*#?:?\s*([a-z0-9\-]+)',
+    r'inv\s*#?:?\s*([a-z0-9\-]+)',
+    r'invoice\s+number:?\s*([a-z0-9\-]+)'
+)]
+_INVOICE_DATE_PATTERNS = [re.compile(p) for p in (
+    r'invoice\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'dated?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+)]
+_DUE_DATE_PATTERNS = [re.compile(p) for p in (
+    r'due\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'payment\s+due:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+)]
+_SUBTOTAL_RE = re.compile(r'sub\s*total:?\s*\$?\s*([\d,]+\.?\d{0,2})')
+_TAX_RE = re.compile(r'tax:?\s*\$?\s*([\d,]+\.?\d{0,2})')
+_TOTAL_PATTERNS = [re.compile(p) for p in (
+    r'total\s+(?:amount\s+)?due:?\s*\$?\s*([\d,]+\.?\d{0,2})',
+    r'(?:grand\s+)?total:?\s*\$?\s*([\d,]+\.?\d{0,2})',
+    r'amount\s+due:?\s*\$?\s*([\d,]+\.?\d{0,2})'
+)]
+_VENDOR_PATTERNS = [re.compile(p) for p in (
+    r'(?:from|vendor|seller|billed?\s+from):?\s*([^\n]+)',
+    # Anchored at the start of a name-character run so a failed attempt is
+    # never retried from inside the same run (quadratic on long prose)
+    r'(?<![a-z\s&,\.])[\s&,\.]*+([a-z][a-z\s&,\.]+(?:inc|llc|ltd|corp|company))'
+)]
+_ADDRESS_RE = re.compile(r'(?<!\d)(\d+\s+[a-z\s,]+(?:street|st|avenue|ave|road|rd|boulevard|blvd)[^\n]*)')
+_PHONE_RE = re.compile(r'(?:phone|tel|phone):?\s*([\d\-\(\)\s]+)')
+_EMAIL_RE = re.compile(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})')
+_CUSTOMER_PATTERNS = [re.compile(p) for p in (
+    r'(?:bill\s+to|customer|buyer|sold\s+to):?\s*([^\n]+)',
+)]
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+_NON_DECIMAL_RE = re.compile(r'[^\d\.]')
+# Same run-start anchoring as the vendor pattern
+_LINE_ITEM_TEXT_RE = re.compile(r'(?<![A-Za-z\s\-])([A-Za-z\s\-]+)\s+(\d+)\s+\$?([\d,]+\.?\d{0,2})\s+\$?([\d,]+\.?\d{0,2})')
+
+
+def _parse_quantity(value: str):
+    """Parse a quantity cell, keeping the raw text if it has no digits"""
+    try:
+        return int(_NON_DIGIT_RE.sub('', value))
+    except ValueError:
+        return value
+
+
+def _parse_amount(value: str):
+    """Parse a price/amount cell, keeping the raw text if it is not a number"""
+    try:
+        return float(_NON_DECIMAL_RE.sub('', value))
+    except ValueError:
+        return value
+
+
+# Line item columns: (header keywords, field, converter), first match wins
+_LINE_ITEM_COLUMNS = (
+    (('desc', 'item'), 'description', None),
+    (('qty', 'quantity'), 'quantity', _parse_quantity),
+    (('price', 'rate'), 'unit_price', _parse_amount),
+    (('amount', 'total'), 'amount', _parse_amount),
+)
+
+
+def _column_map(headers: List[str]) -> List[Tuple[int, str, Optional[Callable[[str], Any]]]]:
+    """Resolve each header to the line item field it fills"""
+    col_map = []
+    for idx, header in enumerate(headers):
+        for keywords, field, convert in _LINE_ITEM_COLUMNS:
+            if any(keyword in header for keyword in keywords):
+                col_map.append((idx, field, convert))
+                break
+    return col_map
 
 
 class InvoiceParser:
@@ -36,17 +114,29 @@ class InvoiceParser:
         """
         logger.info("Parsing invoice deterministically")
         
-        soup = BeautifulSoup(markdown, 'html.parser')
-        text = soup.get_text()
+        # Plain text has nothing for the HTML parser to do (no tags, entities or
+        # CR newlines to normalize), so it is used as-is
+        if MARKUP_RE.search(markdown):
+            tree = LexborHTMLParser(markdown)
+            text = tree.text()
+            # Only the <table> nodes are needed for line items
+            tables = tree.css('table')
+        else:
+            text = markdown
+            tables = []
+        text_lower = lower_ascii(text)
+        entity_ids = new_entity_ids()
         
         entities = []
         
         # Extract invoice metadata
-        invoice_data = self._extract_invoice_metadata(text, markdown)
+        invoice_data = self._extract_invoice_metadata(text, text_lower, markdown)
         
         # Create Invoice entity
-        invoice_entity = Entity(
-            id=f"ent_{uuid.uuid4().hex[:12]}",
+        # Entities and citations here are built from values this parser produced
+        # itself, so they are constructed without Pydantic validation
+        invoice_entity = Entity.model_construct(
+            id=next(entity_ids),
             type=EntityType.INVOICE,
             name=f"Invoice {invoice_data.get('invoice_number', 'Unknown')}",
             properties={
@@ -59,17 +149,17 @@ class InvoiceParser:
                 "currency": invoice_data.get("currency", "USD"),
                 "status": invoice_data.get("status", "pending")
             },
-            citations=[Citation(page=1, section="Invoice Header")],
+            citations=[Citation.model_construct(page=1, section="Invoice Header")],
             document_id=document_id,
             graph_id=graph_id
         )
         entities.append(invoice_entity)
         
         # Extract vendor (bill from)
-        vendor_data = self._extract_vendor(text)
+        vendor_data = self._extract_vendor(text, text_lower)
         if vendor_data:
-            vendor_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            vendor_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.VENDOR,
                 name=vendor_data.get("name", "Unknown Vendor"),
                 properties={
@@ -78,17 +168,17 @@ class InvoiceParser:
                     "email": vendor_data.get("email"),
                     "tax_id": vendor_data.get("tax_id")
                 },
-                citations=[Citation(page=1, section="Vendor Information")],
+                citations=[Citation.model_construct(page=1, section="Vendor Information")],
                 document_id=document_id,
                 graph_id=graph_id
             )
             entities.append(vendor_entity)
         
         # Extract customer (bill to)
-        customer_data = self._extract_customer(text)
+        customer_data = self._extract_customer(text, text_lower)
         if customer_data:
-            customer_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            customer_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.COMPANY,
                 name=customer_data.get("name", "Unknown Customer"),
                 properties={
@@ -96,17 +186,17 @@ class InvoiceParser:
                     "phone": customer_data.get("phone"),
                     "email": customer_data.get("email")
                 },
-                citations=[Citation(page=1, section="Customer Information")],
+                citations=[Citation.model_construct(page=1, section="Customer Information")],
                 document_id=document_id,
                 graph_id=graph_id
             )
             entities.append(customer_entity)
         
         # Extract line items
-        line_items = self._extract_line_items(soup, text)
+        line_items = self._extract_line_items(tables, text)
         for idx, item in enumerate(line_items):
-            item_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            item_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.METRIC,  # Line items as metrics
                 name=item.get("description", f"Line Item {idx+1}"),
                 properties={
@@ -117,7 +207,7 @@ class InvoiceParser:
                     "item_code": item.get("item_code"),
                     "category": "invoice_line_item"
                 },
-                citations=[Citation(page=1, section=f"Line Item {idx+1}")],
+                citations=[Citation.model_construct(page=1, section=f"Line Item {idx+1}")],
                 document_id=document_id,
                 graph_id=graph_id
             )
@@ -126,168 +216,125 @@ class InvoiceParser:
         logger.info(f"Extracted {len(entities)} entities from invoice")
         return entities
     
-    def _extract_invoice_metadata(self, text: str, markdown: str) -> Dict[str, Any]:
+    def _extract_invoice_metadata(self, text: str, text_lower: str, markdown: str) -> Dict[str, Any]:
         """Extract invoice number, dates, amounts"""
         data = {}
         
         # Invoice number
-        patterns = [
-            r'invoice\s*#?:?\s*([A-Z0-9\-]+)',
-            r'inv\s*#?:?\s*([A-Z0-9\-]+)',
-            r'invoice\s+number:?\s*([A-Z0-9\-]+)'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _INVOICE_NUMBER_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
-                data["invoice_number"] = match.group(1)
+                data["invoice_number"] = match_original(text, match)
                 break
         
         # Invoice date
-        date_patterns = [
-            r'invoice\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'dated?:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _INVOICE_DATE_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["invoice_date"] = match.group(1)
                 break
         
         # Due date
-        due_patterns = [
-            r'due\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'payment\s+due:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        ]
-        for pattern in due_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _DUE_DATE_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["due_date"] = match.group(1)
                 break
         
         # Amounts
         # Subtotal
-        subtotal_match = re.search(r'sub\s*total:?\s*\$?\s*([\d,]+\.?\d{0,2})', text, re.IGNORECASE)
+        subtotal_match = _SUBTOTAL_RE.search(text_lower)
         if subtotal_match:
             data["subtotal"] = float(subtotal_match.group(1).replace(',', ''))
         
         # Tax
-        tax_match = re.search(r'tax:?\s*\$?\s*([\d,]+\.?\d{0,2})', text, re.IGNORECASE)
+        tax_match = _TAX_RE.search(text_lower)
         if tax_match:
             data["tax"] = float(tax_match.group(1).replace(',', ''))
         
         # Total
-        total_patterns = [
-            r'total\s+(?:amount\s+)?due:?\s*\$?\s*([\d,]+\.?\d{0,2})',
-            r'(?:grand\s+)?total:?\s*\$?\s*([\d,]+\.?\d{0,2})',
-            r'amount\s+due:?\s*\$?\s*([\d,]+\.?\d{0,2})'
-        ]
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _TOTAL_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["total"] = float(match.group(1).replace(',', ''))
                 break
         
         return data
     
-    def _extract_vendor(self, text: str) -> Dict[str, Any]:
+    def _extract_vendor(self, text: str, text_lower: str) -> Dict[str, Any]:
         """Extract vendor/seller information"""
         vendor = {}
         
         # Look for "From:", "Vendor:", "Seller:", etc.
-        patterns = [
-            r'(?:from|vendor|seller|billed?\s+from):?\s*([^\n]+)',
-            r'([A-Z][A-Za-z\s&,\.]+(?:Inc|LLC|Ltd|Corp|Company))'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _VENDOR_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
-                vendor["name"] = match.group(1).strip()
+                vendor["name"] = match_original(text, match).strip()
                 break
         
         # Extract contact info near vendor name
         if vendor.get("name"):
             # Look for address
-            address_match = re.search(r'(\d+\s+[A-Za-z\s,]+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd)[^\n]*)', text, re.IGNORECASE)
+            address_match = _ADDRESS_RE.search(text_lower)
             if address_match:
-                vendor["address"] = address_match.group(1).strip()
+                vendor["address"] = match_original(text, address_match).strip()
             
             # Phone
-            phone_match = re.search(r'(?:phone|tel|phone):?\s*([\d\-\(\)\s]+)', text, re.IGNORECASE)
+            phone_match = _PHONE_RE.search(text_lower)
             if phone_match:
                 vendor["phone"] = phone_match.group(1).strip()
             
             # Email
-            email_match = re.search(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', text)
+            email_match = _EMAIL_RE.search(text)
             if email_match:
                 vendor["email"] = email_match.group(1)
         
         return vendor if vendor else None
     
-    def _extract_customer(self, text: str) -> Dict[str, Any]:
+    def _extract_customer(self, text: str, text_lower: str) -> Dict[str, Any]:
         """Extract customer/buyer information"""
         customer = {}
         
         # Look for "Bill To:", "Customer:", "Buyer:", etc.
-        patterns = [
-            r'(?:bill\s+to|customer|buyer|sold\s+to):?\s*([^\n]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _CUSTOMER_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
-                customer["name"] = match.group(1).strip()
+                customer["name"] = match_original(text, match).strip()
                 break
         
         return customer if customer else None
     
-    def _extract_line_items(self, soup: BeautifulSoup, text: str) -> List[Dict[str, Any]]:
-        """Extract line items from table or text"""
+    def _extract_line_items(self, tables: List[Node], text: str) -> List[Dict[str, Any]]:
+        """Extract line items from table nodes or text"""
         line_items = []
         
         # Try to find line items in table
-        tables = soup.find_all('table')
         for table in tables:
             # Look for table with columns: description, quantity, price, amount
-            rows = table.find_all('tr')
-            if len(rows) < 2:
+            # Only the header row is read until the table looks like line items
+            header_row = table.css_first('tr')
+            if header_row is None:
                 continue
             
             # Check if this looks like a line items table
-            header_row = rows[0]
-            headers = [cell.get_text(strip=True).lower() for cell in header_row.find_all(['th', 'td'])]
+            headers = [cell.text(strip=True).lower() for cell in header_row.css('th, td')]
             
             # Check for line item indicators
             if any(h in headers for h in ['description', 'item', 'qty', 'quantity', 'price', 'amount']):
-                # This is a line items table
+                # This is a line items table; header dispatch is resolved once
+                # per table, not once per cell
+                col_map = _column_map(headers)
+                rows = table.css('tr')
                 for row in rows[1:]:
-                    cells = row.find_all(['td', 'th'])
+                    cells = row.css('td, th')
                     if len(cells) >= 2:
                         item = {}
                         
                         # Map cells to fields based on position
-                        for idx, cell in enumerate(cells):
-                            cell_text = cell.get_text(strip=True)
-                            if idx < len(headers):
-                                header = headers[idx]
-                                if 'desc' in header or 'item' in header:
-                                    item['description'] = cell_text
-                                elif 'qty' in header or 'quantity' in header:
-                                    try:
-                                        item['quantity'] = int(re.sub(r'[^\d]', '', cell_text))
-                                    except:
-                                        item['quantity'] = cell_text
-                                elif 'price' in header or 'rate' in header:
-                                    try:
-                                        item['unit_price'] = float(re.sub(r'[^\d\.]', '', cell_text))
-                                    except:
-                                        item['unit_price'] = cell_text
-                                elif 'amount' in header or 'total' in header:
-                                    try:
-                                        item['amount'] = float(re.sub(r'[^\d\.]', '', cell_text))
-                                    except:
-                                        item['amount'] = cell_text
+                        for idx, field, convert in col_map:
+                            if idx < len(cells):
+                                cell_text = cells[idx].text(strip=True)
+                                item[field] = convert(cell_text) if convert else cell_text
                         
                         if item.get('description'):
                             line_items.append(item)
@@ -295,8 +342,7 @@ class InvoiceParser:
         # If no table found, try to extract from text
         if not line_items:
             # Look for pattern: item name ... quantity ... price
-            pattern = r'([A-Za-z\s\-]+)\s+(\d+)\s+\$?([\d,]+\.?\d{0,2})\s+\$?([\d,]+\.?\d{0,2})'
-            for match in re.finditer(pattern, text):
+            for match in _LINE_ITEM_TEXT_RE.finditer(text):
                 line_items.append({
                     'description': match.group(1).strip(),
                     'quantity': int(match.group(2)),
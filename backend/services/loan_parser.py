@@ -3,13 +3,95 @@ Deterministic loan agreement parser
 Extracts loan terms, parties, rates, covenants, and maturity dates
 """
 import re
-import uuid
 from typing import Dict, Any, List
-from bs4 import BeautifulSoup
+import ahocorasick
+from selectolax.lexbor import LexborHTMLParser
 from loguru import logger
 
 from models.entity import Entity, EntityType
 from models.citation import Citation
+from services.text_utils import MARKUP_RE, lower_ascii, match_original, new_entity_ids
+
+
+# Compiled once at import; every loan parse reuses them.
+# Keyword patterns are written in lower case and run against the lowered text
+# (see lower_ascii) instead of paying for re.IGNORECASE on every match attempt.
+_LOAN_NUMBER_PATTERNS = [re.compile(p) for p in (
+    r'loan\s*#?:?\s*([a-z0-9\-]+)',
+    r'loan\s+number:?\s*([a-z0-9\-]+)',
+    r'facility\s+number:?\s*([a-z0-9\-]+)'
+)]
+_PRINCIPAL_PATTERNS = [re.compile(p) for p in (
+    r'principal\s+amount:?\s*\$?\s*([\d,]+\.?\d{0,2})',
+    r'loan\s+amount:?\s*\$?\s*([\d,]+\.?\d{0,2})',
+    r'(?:sum|amount)\s+of\s+\$?\s*([\d,]+\.?\d{0,2})'
+)]
+_RATE_PATTERNS = [re.compile(p) for p in (
+    r'interest\s+rate:?\s*([\d\.]+)\s*%',
+    r'at\s+(?:a\s+rate\s+of\s+)?([\d\.]+)\s*%',
+    r'apr:?\s*([\d\.]+)\s*%'
+)]
+_TERM_PATTERNS = [re.compile(p) for p in (
+    r'term\s+of\s+(\d+)\s+(year|month)s?',
+    r'(?:for|over)\s+a\s+period\s+of\s+(\d+)\s+(year|month)s?',
+    r'(\d+)[- ](?:year|month)\s+(?:term|loan)'
+)]
+_ORIGINATION_PATTERNS = [re.compile(p) for p in (
+    r'dated\s+(?:as\s+of\s+)?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'origination\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'effective\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+)]
+_MATURITY_PATTERNS = [re.compile(p) for p in (
+    r'maturity\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'due\s+(?:on|date):?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+    r'final\s+payment\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
+)]
+_COLLATERAL_RE = re.compile(r'(?:secured\s+by|collateral|security):?\s*([^\.\n]+)')
+_PURPOSE_RE = re.compile(r'purpose:?\s*([^\.\n]+)')
+_LENDER_RE = re.compile(r'lender:?\s*([^\n]+)')
+_BORROWER_RE = re.compile(r'borrower:?\s*([^\n]+)')
+_COVENANT_PATTERNS = [(re.compile(p), covenant_type) for p, covenant_type in (
+    (r'debt[- ]to[- ]equity\s+ratio[^\d]*([\d\.]+)', "debt_to_equity_ratio"),
+    (r'minimum\s+(?:net\s+)?(?:working\s+)?capital[^\d]*\$?\s*([\d,]+)', "minimum_capital"),
+    (r'debt\s+service\s+coverage\s+ratio[^\d]*([\d\.]+)', "debt_service_coverage"),
+    (r'leverage\s+ratio[^\d]*([\d\.]+)', "leverage_ratio"),
+    (r'interest\s+coverage\s+ratio[^\d]*([\d\.]+)', "interest_coverage")
+)]
+_MAINTAIN_RE = re.compile(r'(?:borrower|company)\s+shall\s+(?:maintain|not\s+exceed)\s+([^\.]+)\.')
+_FEE_PATTERNS = [
+    ("origination_fee", r'origination\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})'),
+    ("processing_fee", r'processing\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})'),
+    ("late_fee", r'late\s+(?:payment\s+)?fee:?\s*\$?\s*([\d,]+\.?\d{0,2})'),
+    ("prepayment_penalty", r'prepayment\s+penalty:?\s*\$?\s*([\d,]+\.?\d{0,2})'),
+    ("commitment_fee", r'commitment\s+fee:?\s*([\d\.]+)\s*%')
+]
+_PERCENT_FEES = frozenset(fee_type for fee_type, pattern in _FEE_PATTERNS if '%' in pattern)
+# All fee patterns fused into one alternation: a single scan finds every fee.
+# Each alternative is a named group wrapping the pattern's own value group.
+_FEES_RE = re.compile(
+    '|'.join(f'(?P<{fee_type}>{pattern})' for fee_type, pattern in _FEE_PATTERNS)
+)
+# Keyword fields of the loan metadata: (field, [(keyword, value), ...]) with the
+# keywords of each field in priority order (first listed wins)
+_LOAN_KEYWORDS = [
+    ("loan_type", [(kw, kw) for kw in ("term loan", "revolving credit", "line of credit", "mortgage", "bridge loan")]),
+    ("rate_type", [("fixed rate", "fixed"), ("fixed interest", "fixed"),
+                   ("variable rate", "variable"), ("adjustable", "variable"), ("floating", "variable")]),
+    ("payment_frequency", [("monthly", "monthly"), ("quarterly", "quarterly"), ("annually", "annually")]),
+]
+
+
+def _build_keyword_matcher() -> ahocorasick.Automaton:
+    """Build one automaton over every loan keyword"""
+    matcher = ahocorasick.Automaton()
+    for field, keywords in _LOAN_KEYWORDS:
+        for rank, (keyword, value) in enumerate(keywords):
+            matcher.add_word(keyword, (field, rank, value))
+    matcher.make_automaton()
+    return matcher
+
+
+_KEYWORD_MATCHER = _build_keyword_matcher()
 
 
 class LoanParser:
@@ -36,17 +118,26 @@ class LoanParser:
         """
         logger.info("Parsing loan agreement deterministically")
         
-        soup = BeautifulSoup(markdown, 'html.parser')
-        text = soup.get_text()
+        # Plain text has nothing for the HTML parser to do (no tags, entities or
+        # CR newlines to normalize), so it is used as-is
+        if MARKUP_RE.search(markdown):
+            tree = LexborHTMLParser(markdown)
+            text = tree.text()
+        else:
+            text = markdown
+        text_lower = lower_ascii(text)
+        entity_ids = new_entity_ids()
         
         entities = []
         
         # Extract loan metadata
-        loan_data = self._extract_loan_metadata(text)
+        loan_data = self._extract_loan_metadata(text, text_lower)
         
         # Create Loan entity
-        loan_entity = Entity(
-            id=f"ent_{uuid.uuid4().hex[:12]}",
+        # Entities and citations here are built from values this parser produced
+        # itself, so they are constructed without Pydantic validation
+        loan_entity = Entity.model_construct(
+            id=next(entity_ids),
             type=EntityType.LOAN,
             name=f"Loan {loan_data.get('loan_number', loan_data.get('borrower', 'Agreement'))}",
             properties={
@@ -63,17 +154,17 @@ class LoanParser:
                 "collateral": loan_data.get("collateral"),
                 "purpose": loan_data.get("purpose")
             },
-            citations=[Citation(page=1, section="Loan Terms")],
+            citations=[Citation.model_construct(page=1, section="Loan Terms")],
             document_id=document_id,
             graph_id=graph_id
         )
         entities.append(loan_entity)
         
         # Extract lender
-        lender_data = self._extract_lender(text)
+        lender_data = self._extract_lender(text, text_lower)
         if lender_data:
-            lender_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            lender_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.COMPANY,
                 name=lender_data.get("name", "Lender"),
                 properties={
@@ -81,19 +172,19 @@ class LoanParser:
                     "address": lender_data.get("address"),
                     "contact": lender_data.get("contact")
                 },
-                citations=[Citation(page=1, section="Lender Information")],
+                citations=[Citation.model_construct(page=1, section="Lender Information")],
                 document_id=document_id,
                 graph_id=graph_id
             )
             entities.append(lender_entity)
         
         # Extract borrower
-        borrower_data = self._extract_borrower(text)
+        borrower_data = self._extract_borrower(text, text_lower)
         if borrower_data:
             borrower_type = EntityType.COMPANY if any(word in borrower_data.get("name", "").upper() for word in ["INC", "LLC", "CORP", "LTD"]) else EntityType.PERSON
             
-            borrower_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            borrower_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=borrower_type,
                 name=borrower_data.get("name", "Borrower"),
                 properties={
@@ -101,17 +192,19 @@ class LoanParser:
                     "address": borrower_data.get("address"),
                     "credit_score": borrower_data.get("credit_score")
                 },
-                citations=[Citation(page=1, section="Borrower Information")],
+                citations=[Citation.model_construct(page=1, section="Borrower Information")],
                 document_id=document_id,
                 graph_id=graph_id
             )
             entities.append(borrower_entity)
         
         # Extract covenants (loan conditions)
-        covenants = self._extract_covenants(text)
+        covenants = self._extract_covenants(text, text_lower)
+        # One Citation shared by every covenant (and one by every fee)
+        covenant_citation = Citation.model_construct(page=1, section="Covenants")
         for idx, covenant in enumerate(covenants):
-            covenant_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            covenant_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.CLAUSE,
                 name=covenant.get("title", f"Covenant {idx+1}"),
                 properties={
@@ -120,17 +213,18 @@ class LoanParser:
                     "threshold": covenant.get("threshold"),
                     "measurement_frequency": covenant.get("frequency")
                 },
-                citations=[Citation(page=1, section="Covenants")],
+                citations=[covenant_citation],
                 document_id=document_id,
                 graph_id=graph_id
             )
             entities.append(covenant_entity)
         
         # Extract fees
-        fees = self._extract_fees(text)
+        fees = self._extract_fees(text_lower)
+        fee_citation = Citation.model_construct(page=1, section="Fees")
         for fee in fees:
-            fee_entity = Entity(
-                id=f"ent_{uuid.uuid4().hex[:12]}",
+            fee_entity = Entity.model_construct(
+                id=next(entity_ids),
                 type=EntityType.METRIC,
                 name=fee.get("name", "Fee"),
                 properties={
@@ -139,7 +233,7 @@ class LoanParser:
                     "percentage": fee.get("percentage"),
                     "when_due": fee.get("when_due")
                 },
-                citations=[Citation(page=1, section="Fees")],
+                citations=[fee_citation],
                 document_id=document_id,
                 graph_id=graph_id
             )
@@ -148,155 +242,117 @@ class LoanParser:
         logger.info(f"Extracted {len(entities)} entities from loan agreement")
         return entities
     
-    def _extract_loan_metadata(self, text: str) -> Dict[str, Any]:
+    def _extract_loan_metadata(self, text: str, text_lower: str) -> Dict[str, Any]:
         """Extract core loan terms"""
         data = {}
+        keywords = self._scan_keywords(text_lower)
         
         # Loan number/ID
-        loan_num_patterns = [
-            r'loan\s*#?:?\s*([A-Z0-9\-]+)',
-            r'loan\s+number:?\s*([A-Z0-9\-]+)',
-            r'facility\s+number:?\s*([A-Z0-9\-]+)'
-        ]
-        for pattern in loan_num_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _LOAN_NUMBER_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
-                data["loan_number"] = match.group(1)
+                data["loan_number"] = match_original(text, match)
                 break
         
         # Loan type
-        types = ["term loan", "revolving credit", "line of credit", "mortgage", "bridge loan"]
-        for loan_type in types:
-            if loan_type in text.lower():
-                data["loan_type"] = loan_type
-                break
+        if "loan_type" in keywords:
+            data["loan_type"] = keywords["loan_type"]
         
         # Principal amount
-        principal_patterns = [
-            r'principal\s+amount:?\s*\$?\s*([\d,]+\.?\d{0,2})',
-            r'loan\s+amount:?\s*\$?\s*([\d,]+\.?\d{0,2})',
-            r'(?:sum|amount)\s+of\s+\$?\s*([\d,]+\.?\d{0,2})'
-        ]
-        for pattern in principal_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _PRINCIPAL_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 amount_str = match.group(1).replace(',', '')
                 data["principal_amount"] = float(amount_str)
                 break
         
         # Interest rate
-        rate_patterns = [
-            r'interest\s+rate:?\s*([\d\.]+)\s*%',
-            r'at\s+(?:a\s+rate\s+of\s+)?([\d\.]+)\s*%',
-            r'apr:?\s*([\d\.]+)\s*%'
-        ]
-        for pattern in rate_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _RATE_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["interest_rate"] = float(match.group(1))
                 break
         
         # Rate type (fixed or variable)
-        if "fixed rate" in text.lower() or "fixed interest" in text.lower():
-            data["rate_type"] = "fixed"
-        elif "variable rate" in text.lower() or "adjustable" in text.lower() or "floating" in text.lower():
-            data["rate_type"] = "variable"
+        if "rate_type" in keywords:
+            data["rate_type"] = keywords["rate_type"]
         
         # Term
-        term_patterns = [
-            r'term\s+of\s+(\d+)\s+(year|month)s?',
-            r'(?:for|over)\s+a\s+period\s+of\s+(\d+)\s+(year|month)s?',
-            r'(\d+)[- ](?:year|month)\s+(?:term|loan)'
-        ]
-        for pattern in term_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _TERM_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 amount = int(match.group(1))
-                unit = match.group(2).lower()
+                unit = match.group(2)
                 data["term_months"] = amount * 12 if unit == "year" else amount
                 break
         
         # Origination date
-        orig_patterns = [
-            r'dated\s+(?:as\s+of\s+)?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'origination\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'effective\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        ]
-        for pattern in orig_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _ORIGINATION_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["origination_date"] = match.group(1)
                 break
         
         # Maturity date
-        maturity_patterns = [
-            r'maturity\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'due\s+(?:on|date):?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'final\s+payment\s+date:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})'
-        ]
-        for pattern in maturity_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _MATURITY_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 data["maturity_date"] = match.group(1)
                 break
         
         # Payment frequency
-        if "monthly" in text.lower():
-            data["payment_frequency"] = "monthly"
-        elif "quarterly" in text.lower():
-            data["payment_frequency"] = "quarterly"
-        elif "annually" in text.lower():
-            data["payment_frequency"] = "annually"
+        if "payment_frequency" in keywords:
+            data["payment_frequency"] = keywords["payment_frequency"]
         
         # Collateral
-        collateral_match = re.search(r'(?:secured\s+by|collateral|security):?\s*([^\.\n]+)', text, re.IGNORECASE)
+        collateral_match = _COLLATERAL_RE.search(text_lower)
         if collateral_match:
-            data["collateral"] = collateral_match.group(1).strip()
+            data["collateral"] = match_original(text, collateral_match).strip()
         
         # Purpose
-        purpose_match = re.search(r'purpose:?\s*([^\.\n]+)', text, re.IGNORECASE)
+        purpose_match = _PURPOSE_RE.search(text_lower)
         if purpose_match:
-            data["purpose"] = purpose_match.group(1).strip()
+            data["purpose"] = match_original(text, purpose_match).strip()
         
         return data
     
-    def _extract_lender(self, text: str) -> Dict[str, Any]:
+    def _scan_keywords(self, text_lower: str) -> Dict[str, str]:
+        """Resolve every keyword field in a single pass over the text"""
+        best = {}
+        for _, (field, rank, value) in _KEYWORD_MATCHER.iter(text_lower):
+            if field not in best or rank < best[field][0]:
+                best[field] = (rank, value)
+        return {field: value for field, (_, value) in best.items()}
+    
+    def _extract_lender(self, text: str, text_lower: str) -> Dict[str, Any]:
         """Extract lender information"""
         lender = {}
         
         # Look for "Lender:"
-        lender_match = re.search(r'lender:?\s*([^\n]+)', text, re.IGNORECASE)
+        lender_match = _LENDER_RE.search(text_lower)
         if lender_match:
-            lender["name"] = lender_match.group(1).strip()
+            lender["name"] = match_original(text, lender_match).strip()
         
         return lender if lender else None
     
-    def _extract_borrower(self, text: str) -> Dict[str, Any]:
+    def _extract_borrower(self, text: str, text_lower: str) -> Dict[str, Any]:
         """Extract borrower information"""
         borrower = {}
         
         # Look for "Borrower:"
-        borrower_match = re.search(r'borrower:?\s*([^\n]+)', text, re.IGNORECASE)
+        borrower_match = _BORROWER_RE.search(text_lower)
         if borrower_match:
-            borrower["name"] = borrower_match.group(1).strip()
+            borrower["name"] = match_original(text, borrower_match).strip()
         
         return borrower if borrower else None
     
-    def _extract_covenants(self, text: str) -> List[Dict[str, Any]]:
+    def _extract_covenants(self, text: str, text_lower: str) -> List[Dict[str, Any]]:
         """Extract loan covenants"""
         covenants = []
         
         # Common covenant types
-        covenant_patterns = [
-            (r'debt[- ]to[- ]equity\s+ratio[^\d]*([\d\.]+)', "debt_to_equity_ratio"),
-            (r'minimum\s+(?:net\s+)?(?:working\s+)?capital[^\d]*\$?\s*([\d,]+)', "minimum_capital"),
-            (r'debt\s+service\s+coverage\s+ratio[^\d]*([\d\.]+)', "debt_service_coverage"),
-            (r'leverage\s+ratio[^\d]*([\d\.]+)', "leverage_ratio"),
-            (r'interest\s+coverage\s+ratio[^\d]*([\d\.]+)', "interest_coverage")
-        ]
-        
-        for pattern, covenant_type in covenant_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern, covenant_type in _COVENANT_PATTERNS:
+            match = pattern.search(text_lower)
             if match:
                 threshold = match.group(1).replace(',', '')
                 covenants.append({
@@ -307,9 +363,8 @@ class LoanParser:
                 })
         
         # Look for "shall maintain" or "shall not exceed" clauses
-        maintain_pattern = r'(?:borrower|company)\s+shall\s+(?:maintain|not\s+exceed)\s+([^\.]+)\.'
-        for match in re.finditer(maintain_pattern, text, re.IGNORECASE):
-            covenant_text = match.group(1).strip()
+        for match in _MAINTAIN_RE.finditer(text_lower):
+            covenant_text = match_original(text, match).strip()
             covenants.append({
                 "title": "Financial Covenant",
                 "covenant_type": "general",
@@ -321,35 +376,33 @@ class LoanParser:
         
         return covenants
     
-    def _extract_fees(self, text: str) -> List[Dict[str, Any]]:
+    def _extract_fees(self, text_lower: str) -> List[Dict[str, Any]]:
         """Extract loan fees"""
         fees = []
         
-        # Fee patterns
-        fee_patterns = [
-            (r'origination\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "origination_fee"),
-            (r'processing\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "processing_fee"),
-            (r'late\s+(?:payment\s+)?fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "late_fee"),
-            (r'prepayment\s+penalty:?\s*\$?\s*([\d,]+\.?\d{0,2})', "prepayment_penalty"),
-            (r'commitment\s+fee:?\s*([\d\.]+)\s*%', "commitment_fee")
-        ]
-        
-        for pattern, fee_type in fee_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                amount_str = match.group(1).replace(',', '')
-                if '%' in pattern:
-                    fees.append({
-                        "name": fee_type.replace('_', ' ').title(),
-                        "fee_type": fee_type,
-                        "percentage": float(amount_str)
-                    })
-                else:
-                    fees.append({
-                        "name": fee_type.replace('_', ' ').title(),
-                        "fee_type": fee_type,
-                        "amount": float(amount_str)
-                    })
+        # First occurrence of each fee type, found in one pass
+        found = {}
+        for match in _FEES_RE.finditer(text_lower):
+            # The value is the group right after the fee type's named group
+            found.setdefault(match.lastgroup, match.group(match.lastindex + 1))
+        
+        # Fee patterns, reported in declaration order
+        for fee_type, _ in _FEE_PATTERNS:
+            if fee_type not in found:
+                continue
+            amount_str = found[fee_type].replace(',', '')
+            if fee_type in _PERCENT_FEES:
+                fees.append({
+                    "name": fee_type.replace('_', ' ').title(),
+                    "fee_type": fee_type,
+                    "percentage": float(amount_str)
+                })
+            else:
+                fees.append({
+                    "name": fee_type.replace('_', ' ').title(),
+                    "fee_type": fee_type,
+                    "amount": float(amount_str)
+                })
         
         return fees
 
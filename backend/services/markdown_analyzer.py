@@ -3,28 +3,95 @@ Markdown Structure Analyzer
 Analyzes markdown to automatically generate optimal extraction schemas
 No LLM needed - pure deterministic analysis!
 """
+import copy
+import hashlib
 import re
+from collections import OrderedDict
 from typing import Dict, Any, List, Tuple, Optional
 from loguru import logger
-from bs4 import BeautifulSoup
+
+from services.markdown_parser import ParsedTable, parse_html_tables
+
+
+# Compiled once at import; schema analysis runs them per line and per header
+_PIPE_SEPARATOR_RE = re.compile(r'^\s*\|[\s\-:]+\|')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNDERSCORES_RE = re.compile(r'_+')
+# ASCII fast path for _to_snake_case: one translate pass drops what
+# _NON_WORD_RE would and turns each whitespace char into '_'
+_SNAKE_TABLE = str.maketrans({
+    c: None if not c.isspace() else '_'
+    for c in map(chr, range(128))
+    if not (c.isalnum() or c == '_')
+})
+# A line containing '|' directly followed by a |---|---| separator line
+_PIPE_TABLE_START_RE = re.compile(r'^[^\n]*\|[^\n]*\n[^\S\n]*\|(?:[^\S\n]|[\-:])+\|', re.MULTILINE)
+
+# Pipe table detection only looks at the start of the document
+PIPE_DETECT_LINES = 100
+
+# Schemas are memoized per markdown digest for this many documents
+SCHEMA_CACHE_SIZE = 64
+
+
+def _keywords_re(*keywords: str) -> re.Pattern:
+    """One alternation matching any of the keywords as a substring"""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+# Header keywords, each group matched in a single regex search
+_NUMERIC_KEYWORDS_RE = _keywords_re(
+    'amount', 'total', 'balance', 'price', 'cost', 'value',
+    'count', 'quantity', 'number', 'rate', 'percent', 'tax',
+    'receivable', 'payable', 'asset', 'liability', 'equity',
+    'revenue', 'expense', 'income', 'cash', 'investment'
+)
+_DATE_KEYWORDS_RE = _keywords_re('date', 'time', 'year', 'month', 'day')
+# Array names in priority order, by the keywords any header must contain
+_ARRAY_NAMES = (
+    (_keywords_re('city'), "cities"),
+    (_keywords_re('company', 'organization'), "companies"),
+    (_keywords_re('person', 'employee'), "people"),
+    (_keywords_re('product', 'item'), "items"),
+    (_keywords_re('transaction', 'payment'), "transactions"),
+)
 
 
 class MarkdownSchemaAnalyzer:
     """Analyzes markdown structure to generate optimal extraction schemas"""
     
     def __init__(self):
-        pass
+        # Digest of the markdown -> generated schema, least recently used first
+        self._schema_cache: OrderedDict[bytes, Dict[str, Any]] = OrderedDict()
     
     def analyze_and_generate_schema(self, markdown: str) -> Dict[str, Any]:
         """
         Analyze markdown content and generate an optimal extraction schema
         
+        The analysis is deterministic, so retries and reprocessing of the same
+        markdown reuse the cached schema. Callers get their own copy.
+        
         Args:
             markdown: Markdown content to analyze
             
         Returns:
             JSON schema optimized for the content
         """
+        digest = hashlib.blake2b(markdown.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        schema = self._schema_cache.get(digest)
+        if schema is not None:
+            self._schema_cache.move_to_end(digest)
+            logger.info(f"Reusing cached schema for identical markdown ({len(markdown)} chars)")
+        else:
+            schema = self._analyze(markdown)
+            self._schema_cache[digest] = schema
+            if len(self._schema_cache) > SCHEMA_CACHE_SIZE:
+                self._schema_cache.popitem(last=False)
+        return copy.deepcopy(schema)
+    
+    def _analyze(self, markdown: str) -> Dict[str, Any]:
+        """Run the structure analysis and build the schema"""
         logger.info(f"Analyzing markdown structure ({len(markdown)} chars)")
         
         # Detect document type and structure
@@ -47,36 +114,31 @@ class MarkdownSchemaAnalyzer:
     
     def _detect_pipe_tables(self, markdown: str) -> bool:
         """Detect if markdown contains pipe-delimited tables"""
-        # Look for table pattern: | col1 | col2 | col3 |
-        lines = markdown.split('\n')
-        for i, line in enumerate(lines[:100]):  # Check first 100 lines
-            if '|' in line and i + 1 < len(lines):
-                next_line = lines[i + 1]
-                # Check for separator line: |---|---|---|
-                if re.match(r'^\s*\|[\s\-:]+\|', next_line):
-                    return True
-        return False
+        # Look for table pattern: | col1 | col2 | col3 | followed by |---|---|---|
+        # with the header in the first 100 lines. Only that prefix is searched;
+        # the rest of the document is never split or scanned.
+        end = -1
+        for _ in range(PIPE_DETECT_LINES + 1):
+            end = markdown.find('\n', end + 1)
+            if end == -1:
+                end = len(markdown)
+                break
+        return _PIPE_TABLE_START_RE.search(markdown, 0, end) is not None
     
     def _generate_schema_from_html_tables(self, markdown: str) -> Dict[str, Any]:
         """Generate schema by analyzing HTML tables"""
         try:
-            soup = BeautifulSoup(markdown, 'html.parser')
-            tables = soup.find_all('table')
+            tables = parse_html_tables(markdown)
             
             if not tables:
                 return self._generate_generic_schema(markdown)
             
             # Extract headers from ALL tables (they might be continuations of the same table)
-            all_headers = []
-            seen_headers = set()
-            
+            # A dict keeps first-seen order and drops duplicates in one structure
+            unique_headers = {}
             for table in tables:
-                headers = self._extract_table_headers(table)
-                for header in headers:
-                    # Avoid duplicates
-                    if header not in seen_headers:
-                        all_headers.append(header)
-                        seen_headers.add(header)
+                unique_headers.update(dict.fromkeys(self._extract_table_headers(table)))
+            all_headers = list(unique_headers)
             
             if not all_headers:
                 logger.warning("Could not extract table headers, using generic schema")
@@ -92,27 +154,17 @@ class MarkdownSchemaAnalyzer:
             logger.error(f"Error analyzing HTML tables: {e}", exc_info=True)
             return self._generate_generic_schema(markdown)
     
-    def _extract_table_headers(self, table) -> List[str]:
+    def _extract_table_headers(self, table: ParsedTable) -> List[str]:
         """Extract column headers from HTML table"""
-        headers = []
-        
-        # Try to find header row (first <tr>)
-        rows = table.find_all('tr')
-        if not rows:
-            return headers
-        
         # Try first few rows to find the best header row
         # (sometimes first row is a category label, actual headers are in row 2)
         best_headers = []
         max_valid_headers = 0
         
-        for row_idx in range(min(3, len(rows))):  # Check first 3 rows
-            row = rows[row_idx]
-            cells = row.find_all(['th', 'td'])
+        for cell_texts in table.header_candidates:  # Check first 3 rows
             current_headers = []
             
-            for cell in cells:
-                header_text = cell.get_text(strip=True)
+            for header_text in cell_texts:
                 if header_text and len(header_text) < 100:  # Reasonable header length
                     # Convert to snake_case
                     header_snake = self._to_snake_case(header_text)
@@ -128,14 +180,18 @@ class MarkdownSchemaAnalyzer:
     
     def _to_snake_case(self, text: str) -> str:
         """Convert text to snake_case"""
-        # Remove special characters
-        text = re.sub(r'[^\w\s]', '', text)
-        # Replace spaces with underscores
-        text = re.sub(r'\s+', '_', text)
+        if text.isascii():
+            # Remove special characters and replace spaces in one pass
+            text = text.translate(_SNAKE_TABLE)
+        else:
+            # Remove special characters
+            text = _NON_WORD_RE.sub('', text)
+            # Replace spaces with underscores
+            text = _WHITESPACE_RE.sub('_', text)
         # Convert to lowercase
         text = text.lower()
         # Remove multiple underscores
-        text = re.sub(r'_+', '_', text)
+        text = _UNDERSCORES_RE.sub('_', text)
         # Remove leading/trailing underscores
         text = text.strip('_')
         return text or 'field'
@@ -177,38 +233,24 @@ class MarkdownSchemaAnalyzer:
     
     def _generate_array_name(self, headers: List[str]) -> str:
         """Generate a meaningful array name from headers"""
-        # Common patterns
-        if any('city' in h.lower() for h in headers):
-            return "cities"
-        elif any('company' in h.lower() or 'organization' in h.lower() for h in headers):
-            return "companies"
-        elif any('person' in h.lower() or 'employee' in h.lower() for h in headers):
-            return "people"
-        elif any('product' in h.lower() or 'item' in h.lower() for h in headers):
-            return "items"
-        elif any('transaction' in h.lower() or 'payment' in h.lower() for h in headers):
-            return "transactions"
-        else:
-            return "records"
+        # Common patterns; keywords never contain a newline, so one search over
+        # the joined headers matches exactly when some header contains one
+        headers_lower = '\n'.join(headers).lower()
+        for keywords_re, array_name in _ARRAY_NAMES:
+            if keywords_re.search(headers_lower):
+                return array_name
+        return "records"
     
     def _infer_field_type(self, field_name: str) -> str:
         """Infer JSON schema type from field name"""
         field_lower = field_name.lower()
         
         # Numeric indicators
-        numeric_keywords = [
-            'amount', 'total', 'balance', 'price', 'cost', 'value', 
-            'count', 'quantity', 'number', 'rate', 'percent', 'tax',
-            'receivable', 'payable', 'asset', 'liability', 'equity',
-            'revenue', 'expense', 'income', 'cash', 'investment'
-        ]
-        
-        if any(keyword in field_lower for keyword in numeric_keywords):
+        if _NUMERIC_KEYWORDS_RE.search(field_lower):
             return "number"
         
         # Date indicators
-        date_keywords = ['date', 'time', 'year', 'month', 'day']
-        if any(keyword in field_lower for keyword in date_keywords):
+        if _DATE_KEYWORDS_RE.search(field_lower):
             return "string"  # Keep as string for flexibility
         
         # Default to string
@@ -223,7 +265,7 @@ class MarkdownSchemaAnalyzer:
             for i, line in enumerate(lines):
                 if '|' in line and i + 1 < len(lines):
                     next_line = lines[i + 1]
-                    if re.match(r'^\s*\|[\s\-:]+\|', next_line):
+                    if _PIPE_SEPARATOR_RE.match(next_line):
                         # Found table header
                         headers = [h.strip() for h in line.split('|') if h.strip()]
                         headers_snake = [self._to_snake_case(h) for h in headers]
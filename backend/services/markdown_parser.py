@@ -2,10 +2,160 @@
 Deterministic markdown table parser for extracting structured data
 No LLM needed - pure Python parsing of markdown tables
 """
+import hashlib
+import itertools
+import json
 import re
-from typing import Dict, Any, List, Tuple, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Tuple, Optional
 from loguru import logger
-from bs4 import BeautifulSoup
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+from config import settings
+
+
+# Compiled once at import; header cleaning runs them for every header cell
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+# ASCII fast path for _NON_WORD_RE: the same characters, dropped by translate
+_NON_WORD_TABLE = str.maketrans({
+    c: None
+    for c in map(chr, range(128))
+    if not (c.isalnum() or c == '_' or c.isspace())
+})
+# A pipe table block: a line starting with '|' (after whitespace) that holds at
+# least 3 pipes, followed by all consecutive lines that start with '|'
+_PIPE_TABLE_RE = re.compile(r'^[^\S\n]*\|(?:[^|\n]*\|){2}[^\n]*(?:\n[^\S\n]*\|[^\n]*)*', re.MULTILINE)
+
+# Cell value coercion in _create_entity_from_row
+_EMPTY_VALUES = frozenset({"", "-", "N/A", "n/a"})
+_TEXT_COLUMNS = frozenset({'county', 'state', 'country'})
+_NUMBER_NOISE = str.maketrans('', '', ',$')
+_INT_RE = re.compile(r'[+-]?\d(?:_?\d)*')
+_FLOAT_RE = re.compile(r'[+-]?(?:\d(?:_?\d)*\.(?:\d(?:_?\d)*)?|\.\d(?:_?\d)*)(?:[eE][+-]?\d(?:_?\d)*)?')
+
+# Header detection looks at this many leading rows of each table
+HEADER_CANDIDATE_ROWS = 3
+# Writes debug dumps off the request path; threads start on first use
+_DEBUG_DUMP_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="markdown-debug-dump")
+# Opening and closing table tags, used to cut table regions out of the
+# markdown, and HTML comments, whose contents are skipped (an unclosed comment
+# runs to the end of the document, as in a full parse)
+_TABLE_TAG_RE = re.compile(r'<!--(?:-?>|[\s\S]*?(?:--!?>|\Z))|<(/?)table\b', re.IGNORECASE)
+# Parsed tables are kept per markdown digest for this many documents
+TABLE_CACHE_SIZE = 4
+_table_cache: "OrderedDict[bytes, Tuple[ParsedTable, ...]]" = OrderedDict()
+_table_cache_lock = threading.Lock()
+
+
+def _serialize_debug_dump(data: Dict[str, Any]) -> Optional[bytes]:
+    """Serialize an extraction result for a debug dump, or None if it can't be"""
+    try:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    except TypeError:
+        pass
+    # orjson rejects e.g. integers wider than 64 bits; the stdlib encoder doesn't
+    try:
+        return json.dumps(data, indent=2, default=str).encode()
+    except Exception as e:
+        logger.warning(f"Could not serialize debug output: {e}")
+        return None
+
+
+def _write_debug_dump(path: str, payload: bytes) -> None:
+    """Write a serialized extraction result for inspection"""
+    try:
+        with open(path, 'wb') as f:
+            f.write(payload)
+        logger.info(f"Table extraction result saved to: {path}")
+    except Exception as e:
+        logger.warning(f"Could not save debug output: {e}")
+
+
+@dataclass(frozen=True)
+class ParsedTable:
+    """An HTML table's <td> text per row plus the cell text of its candidate header rows"""
+    
+    rows: Tuple[Tuple[str, ...], ...]
+    header_candidates: Tuple[Tuple[str, ...], ...]
+
+
+def _table_regions(markdown: str) -> str:
+    """
+    Cut the outermost <table> elements out of markdown.
+    
+    Only table markup reaches the HTML parser, so the tree it builds scales
+    with table bytes rather than document bytes. A table left unclosed runs
+    to the end of the document, as it would in a full parse. Table tags
+    inside HTML comments are not markup and are skipped.
+    """
+    regions = []
+    depth = 0
+    start = 0
+    for match in _TABLE_TAG_RE.finditer(markdown):
+        if match.group(1) is None:
+            # An HTML comment; inside a table region it is kept in the slice
+            continue
+        if not match.group(1):
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth:
+            depth -= 1
+            if depth == 0:
+                end = markdown.find('>', match.end())
+                end = len(markdown) if end == -1 else end + 1
+                regions.append(markdown[start:end])
+    if depth:
+        regions.append(markdown[start:])
+    return '\n'.join(regions)
+
+
+def _parse_html_tables(markdown: str) -> Tuple[ParsedTable, ...]:
+    """Parse the HTML tables in markdown into plain cell text"""
+    tables = []
+    html = _table_regions(markdown)
+    if not html:
+        return ()
+    for table in LexborHTMLParser(html).css('table'):
+        rows = table.css('tr')
+        header_candidates = tuple(
+            tuple(cell.text(strip=True) for cell in row.css('th, td'))
+            for row in rows[:HEADER_CANDIDATE_ROWS]
+        )
+        cell_rows = tuple(
+            tuple(cell.text(strip=True) for cell in row.css('td'))
+            for row in rows
+        )
+        tables.append(ParsedTable(rows=cell_rows, header_candidates=header_candidates))
+    return tuple(tables)
+
+
+def parse_html_tables(markdown: str) -> Tuple[ParsedTable, ...]:
+    """
+    Parse the HTML tables in markdown once.
+    
+    Schema analysis and table extraction run in different pipeline stages
+    but read the same document's tables, so the parse is cached by markdown
+    digest. Only cell text is kept, never the document or its DOM.
+    """
+    digest = hashlib.blake2b(markdown.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _table_cache_lock:
+        tables = _table_cache.get(digest)
+        if tables is not None:
+            _table_cache.move_to_end(digest)
+            return tables
+    tables = _parse_html_tables(markdown)
+    with _table_cache_lock:
+        _table_cache[digest] = tables
+        if len(_table_cache) > TABLE_CACHE_SIZE:
+            _table_cache.popitem(last=False)
+    return tables
 
 
 class MarkdownTableParser:
@@ -33,35 +183,32 @@ class MarkdownTableParser:
         """
         logger.info(f"Parsing markdown tables deterministically ({len(markdown)} chars)")
         
-        entities = []
-        
-        # Parse HTML tables (ADE outputs HTML table tags in markdown)
-        html_entities = self._parse_html_tables(markdown, max_entities)
-        entities.extend(html_entities)
-        
-        # Parse markdown pipe tables (| col1 | col2 | format)
-        if len(entities) < max_entities:
-            pipe_entities = self._parse_pipe_tables(markdown, max_entities - len(entities))
-            entities.extend(pipe_entities)
+        # HTML tables first (ADE outputs HTML table tags in markdown), then
+        # markdown pipe tables (| col1 | col2 | format); parsing stops once
+        # max_entities have been produced
+        entities = list(itertools.islice(
+            itertools.chain(
+                self._iter_html_table_entities(markdown),
+                self._iter_pipe_table_entities(markdown)
+            ),
+            max_entities
+        ))
         
         logger.info(f"Parsed {len(entities)} entities from markdown tables")
         
-        # Save debug output
-        import time
-        import json
-        debug_path = f"/tmp/markdown_table_extraction_{int(time.time())}.json"
-        try:
-            with open(debug_path, 'w') as f:
-                json.dump({
-                    "entities": entities,
-                    "extraction_metadata": {
-                        "total_entities": len(entities),
-                        "tables_found": "multiple"
-                    }
-                }, f, indent=2)
-            logger.info(f"Table extraction result saved to: {debug_path}")
-        except Exception as e:
-            logger.warning(f"Could not save debug output: {e}")
+        # Save debug output when enabled; serialized here since callers may
+        # mutate the entities once they are returned
+        if settings.MARKDOWN_DEBUG_DUMP:
+            debug_path = f"/tmp/markdown_table_extraction_{int(time.time())}.json"
+            payload = _serialize_debug_dump({
+                "entities": entities,
+                "extraction_metadata": {
+                    "total_entities": len(entities),
+                    "tables_found": "multiple"
+                }
+            })
+            if payload is not None:
+                _DEBUG_DUMP_EXECUTOR.submit(_write_debug_dump, debug_path, payload)
         
         return {
             "entities": entities,
@@ -71,56 +218,38 @@ class MarkdownTableParser:
             }
         }
     
-    def _parse_html_tables(self, markdown: str, max_entities: int) -> List[Dict[str, Any]]:
-        """Parse HTML tables from markdown using BeautifulSoup"""
-        entities = []
-        
+    def _iter_html_table_entities(self, markdown: str) -> Iterator[Dict[str, Any]]:
+        """Parse HTML tables from markdown using selectolax"""
         try:
             # Find all HTML tables
-            soup = BeautifulSoup(markdown, 'html.parser')
-            tables = soup.find_all('table')
+            tables = parse_html_tables(markdown)
             
             logger.info(f"Found {len(tables)} HTML tables in markdown")
             
             for table_idx, table in enumerate(tables):
-                if len(entities) >= max_entities:
-                    break
-                
                 # Extract table data
-                table_entities = self._parse_single_html_table(table, table_idx)
-                entities.extend(table_entities[:max_entities - len(entities)])
+                yield from self._iter_single_html_table(table, table_idx)
             
         except Exception as e:
             logger.error(f"Error parsing HTML tables: {e}")
-        
-        return entities
     
-    def _parse_single_html_table(self, table, table_idx: int) -> List[Dict[str, Any]]:
+    def _iter_single_html_table(self, table: ParsedTable, table_idx: int) -> Iterator[Dict[str, Any]]:
         """Parse a single HTML table into entities"""
-        entities = []
-        
         try:
             # Extract headers (handle multi-row headers)
             headers = []
-            all_rows = table.find_all('tr')
             
             # Try first 3 rows to find the best header row
             best_headers = []
             best_row_idx = 0
             
-            for row_idx in range(min(3, len(all_rows))):
-                row = all_rows[row_idx]
-                row_headers = []
-                
-                for cell in row.find_all(['th', 'td']):
-                    header_text = cell.get_text(strip=True)
-                    cleaned = self._clean_header(header_text)
-                    row_headers.append(cleaned)
+            for row_idx, cell_texts in enumerate(table.header_candidates):
+                row_headers = [self._clean_header(header_text) for header_text in cell_texts]
                 
                 # Count non-empty headers
                 non_empty = sum(1 for h in row_headers if h and h != 'column')
                 
-                logger.debug(f"  Row {row_idx}: {len(row_headers)} cells, {non_empty} non-empty headers")
+                logger.debug("  Row {}: {} cells, {} non-empty headers", row_idx, len(row_headers), non_empty)
                 
                 # Use the row with most non-empty headers
                 if len(row_headers) > len(best_headers) or non_empty > sum(1 for h in best_headers if h and h != 'column'):
@@ -130,63 +259,51 @@ class MarkdownTableParser:
             headers = best_headers
             
             # Log the chosen header row
-            for i, h in enumerate(headers[:15]):
-                logger.debug(f"  Header[{i}]: '{h}'")
+            logger.debug("  Headers[:15]: {}", headers[:15])
             
             if not headers:
                 logger.warning(f"No headers found in table {table_idx}")
-                return entities
+                return
             
             logger.info(f"Table {table_idx}: Found {len(headers)} columns (from row {best_row_idx})")
             logger.info(f"   Headers: {headers[:10]}{'...' if len(headers) > 10 else ''}")
             
             # Extract rows (skip header rows - start after the best header row)
-            rows = table.find_all('tr')[best_row_idx + 1:]  # Skip all header rows
+            rows = table.rows[best_row_idx + 1:]  # Skip all header rows
             
-            for row_idx, row in enumerate(rows):
-                cells = row.find_all('td')
-                if len(cells) < 2:  # Skip empty or malformed rows
+            for row_idx, cell_values in enumerate(rows):
+                if len(cell_values) < 2:  # Skip empty or malformed rows
                     continue
                 
                 # Skip rows that look like headers (all text, no numbers)
-                cell_values = [cell.get_text(strip=True) for cell in cells]
-                has_number = any(any(c.isdigit() for c in val) for val in cell_values)
-                if not has_number and row_idx == 0:  # First data row should have numbers
-                    logger.debug(f"Skipping header-like row: {cell_values[:3]}")
+                if row_idx == 0 and not any(c.isdigit() for val in cell_values for c in val):  # First data row should have numbers
+                    logger.debug("Skipping header-like row: {}", cell_values[:3])
                     continue
                 
                 # Create entity from row
                 entity = self._create_entity_from_row(
                     headers=headers,
-                    cells=cells,
+                    values=list(cell_values),
                     table_idx=table_idx,
                     row_idx=row_idx
                 )
                 
                 if entity:
-                    entities.append(entity)
+                    yield entity
         
         except Exception as e:
             logger.error(f"Error parsing HTML table {table_idx}: {e}")
-        
-        return entities
     
     def _create_entity_from_row(
         self,
         headers: List[str],
-        cells: List[Any],
+        values: List[str],
         table_idx: int,
         row_idx: int
     ) -> Optional[Dict[str, Any]]:
-        """Create an entity dict from a table row"""
+        """Create an entity dict from a table row's cell values"""
         
         try:
-            # Extract cell values
-            values = []
-            for cell in cells:
-                value = cell.get_text(strip=True)
-                values.append(value)
-            
             if not values or len(values) < 2:
                 return None
             
@@ -207,9 +324,6 @@ class MarkdownTableParser:
             # Build properties dict from all columns
             properties = {}
             
-            # DEBUG: Log array lengths
-            logger.debug(f"Row {row_idx}: {len(headers)} headers, {len(values)} values")
-            
             # Handle length mismatch
             if len(headers) != len(values):
                 logger.warning(f"Header/value mismatch: {len(headers)} headers vs {len(values)} values")
@@ -227,33 +341,23 @@ class MarkdownTableParser:
                 
                 # Skip empty headers
                 if not header or header.strip() == '':
-                    logger.debug(f"  Skipping column {i}: empty header")
                     continue
                 
                 # Process ALL values, including strings like county names
-                if value and value not in ["", "-", "N/A", "n/a"]:
-                    # Try to convert to number if possible
-                    clean_value = value.replace(',', '').replace('$', '').strip()
-                    try:
-                        # Try integer first
-                        if '.' not in clean_value and any(c.isdigit() for c in clean_value):
-                            properties[header] = int(clean_value)
-                            logger.debug(f"{header}: {properties[header]} (int)")
-                        elif '.' in clean_value:
-                            properties[header] = float(clean_value)
-                            logger.debug(f"{header}: {properties[header]} (float)")
-                        else:
-                            # Not a number, keep as string (e.g., county names)
-                            properties[header] = value
-                            logger.debug(f"{header}: {value} (string)")
-                    except (ValueError, AttributeError):
-                        # Keep as string
+                if value and value not in _EMPTY_VALUES:
+                    # Convert to number if the cleaned text is one; the patterns
+                    # accept exactly what int()/float() would, without raising
+                    clean_value = value.translate(_NUMBER_NOISE).strip()
+                    if _INT_RE.fullmatch(clean_value):
+                        properties[header] = int(clean_value)
+                    elif _FLOAT_RE.fullmatch(clean_value):
+                        properties[header] = float(clean_value)
+                    else:
+                        # Not a number, keep as string (e.g., county names)
                         properties[header] = value
-                        logger.debug(f"{header}: {value} (string)")
                 else:
                     # Store empty/null values as None for non-numeric fields, 0 for numeric
-                    properties[header] = None if header.lower() in ['county', 'state', 'country'] else 0
-                    logger.debug(f"{header}: {properties[header]} (empty)")
+                    properties[header] = None if header.lower() in _TEXT_COLUMNS else 0
             
             # Only create entity if it has meaningful properties
             if not properties:
@@ -270,59 +374,37 @@ class MarkdownTableParser:
             }
         
         except Exception as e:
-            logger.debug(f"Could not create entity from row {row_idx}: {e}")
+            logger.debug("Could not create entity from row {}: {}", row_idx, e)
             return None
     
     def _clean_header(self, header: str) -> str:
         """Clean and normalize header text"""
         # Remove special characters, convert to snake_case
         cleaned = header.strip().lower()
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = re.sub(r'\s+', '_', cleaned)
+        if cleaned.isascii():
+            cleaned = cleaned.translate(_NON_WORD_TABLE)
+        else:
+            cleaned = _NON_WORD_RE.sub('', cleaned)
+        cleaned = _WHITESPACE_RE.sub('_', cleaned)
         return cleaned or "column"
     
-    def _parse_pipe_tables(self, markdown: str, max_entities: int) -> List[Dict[str, Any]]:
+    def _iter_pipe_table_entities(self, markdown: str) -> Iterator[Dict[str, Any]]:
         """Parse markdown pipe tables (| col1 | col2 | format)"""
-        entities = []
-        
         try:
-            # Find pipe tables using regex
-            # Pattern: lines starting with | and containing multiple |
-            lines = markdown.split('\n')
-            
-            i = 0
+            # Each match is one table: a row with at least 3 pipes, plus every
+            # following line that starts with a pipe
             table_count = 0
-            while i < len(lines) and len(entities) < max_entities:
-                line = lines[i].strip()
-                
-                # Check if this is a table row
-                if line.startswith('|') and line.count('|') >= 3:
-                    # Extract table starting from this line
-                    table_lines = []
-                    while i < len(lines):
-                        curr_line = lines[i].strip()
-                        if curr_line.startswith('|'):
-                            table_lines.append(curr_line)
-                            i += 1
-                        else:
-                            break
-                    
-                    if len(table_lines) >= 2:  # At least header + 1 row
-                        table_entities = self._parse_pipe_table_lines(table_lines, table_count)
-                        entities.extend(table_entities[:max_entities - len(entities)])
-                        table_count += 1
-                else:
-                    i += 1
+            for match in _PIPE_TABLE_RE.finditer(markdown):
+                table_lines = [line.strip() for line in match.group(0).split('\n')]
+                if len(table_lines) >= 2:  # At least header + 1 row
+                    yield from self._iter_pipe_table_lines(table_lines, table_count)
+                    table_count += 1
         
         except Exception as e:
             logger.error(f"Error parsing pipe tables: {e}")
-        
-        return entities
     
-    def _parse_pipe_table_lines(self, lines: List[str], table_idx: int) -> List[Dict[str, Any]]:
+    def _iter_pipe_table_lines(self, lines: List[str], table_idx: int) -> Iterator[Dict[str, Any]]:
         """Parse a markdown pipe table"""
-        entities = []
-        
         try:
             # Extract headers from first line
             header_line = lines[0]
@@ -334,29 +416,29 @@ class MarkdownTableParser:
                 start_row = 2
             
             # Extract data rows
+            value_headers = headers[1:]
             for row_idx, line in enumerate(lines[start_row:]):
-                cells = [cell.strip() for cell in line.split('|')[1:-1]]
-                
-                if len(cells) != len(headers):
+                # A row splits into one cell per pipe minus one; skip mismatched
+                # rows before splitting them
+                if line.count('|') - 1 != len(headers):
                     continue
+                cells = [cell.strip() for cell in line.split('|')[1:-1]]
                 
-                # Create entity
-                entity = {
-                    "type": "metric",  # Default for pipe tables
-                    "name": cells[0] if cells else f"Item_{row_idx}",
-                    "properties": {},
-                    "source_reference": f"Pipe Table {table_idx + 1}, Row {row_idx + 1}"
+                properties = {
+                    header: value
+                    for header, value in zip(value_headers, cells[1:])
+                    if value and value != "-"
                 }
                 
-                for header, value in zip(headers[1:], cells[1:]):
-                    if value and value not in ["", "-"]:
-                        entity["properties"][header] = value
-                
-                if entity["properties"]:
-                    entities.append(entity)
+                # Create entity
+                if properties:
+                    yield {
+                        "type": "metric",  # Default for pipe tables
+                        "name": cells[0] if cells else f"Item_{row_idx}",
+                        "properties": properties,
+                        "source_reference": f"Pipe Table {table_idx + 1}, Row {row_idx + 1}"
+                    }
         
         except Exception as e:
             logger.error(f"Error parsing pipe table {table_idx}: {e}")
-        
-        return entities
 
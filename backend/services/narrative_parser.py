@@ -2,18 +2,161 @@
 Narrative text parser for extracting entities AND relationships from unstructured prose
 Handles risk disclosures, business descriptions, and other narrative content
 """
+import asyncio
+import hashlib
 import re
+import sqlite3
+import threading
+import time
 import uuid
 import json
+import ahocorasick
 import boto3
+from botocore.exceptions import ClientError, ParamValidationError
+from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
-from bs4 import BeautifulSoup
 from loguru import logger
+from selectolax.lexbor import LexborHTMLParser
 
 from config import settings
 from models.entity import Entity, EntityType
 from models.edge import Edge, EdgeType
 from models.citation import Citation
+from services.text_utils import MARKUP_RE, lower_ascii
+
+
+# Compiled once at import; used for every paragraph and LLM response
+_FIRST_SENTENCE_RE = re.compile(r'^([^.!?]{20,250})[.!?]')
+_FENCED_JSON_RE = re.compile(r'```(?:json)?\s*([\s\S]+?)\s*```', re.IGNORECASE)
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]+\}')
+
+# Whole-word keyword lists, matched case-insensitively with one Aho-Corasick
+# pass instead of a regex alternation each; earlier keywords win at a position
+_ORGANIZATION_KEYWORDS = ('Bitcoin', 'Ethereum', 'USDC', 'DocuSign', 'Apple', 'Microsoft', 'Amazon', 'Google', 'Circle')
+_LOCATION_KEYWORDS = ('United States', 'USA', 'U.S.', 'California', 'New York', 'Texas', 'London', 'Singapore')
+
+
+def _plain_text(markdown: str) -> str:
+    """Text content of markdown with any HTML tags and entities resolved"""
+    if MARKUP_RE.search(markdown):
+        return LexborHTMLParser(markdown).text()
+    # Plain text parses to itself; skip building a tree for it
+    return markdown
+
+
+def _is_word_boundary(text: str, pos: int) -> bool:
+    """Whether a regex \\b would match at pos in text"""
+    before = pos > 0 and (text[pos - 1].isalnum() or text[pos - 1] == '_')
+    after = pos < len(text) and (text[pos].isalnum() or text[pos] == '_')
+    return before != after
+
+
+# Bedrock models offering latency-optimized inference
+_LATENCY_OPTIMIZED_MODELS = ("anthropic.claude-3-5-haiku",)
+
+# Bedrock output token ceiling for a batched chunk request (Haiku 3.5's limit)
+MAX_OUTPUT_TOKENS = 8192
+
+_EXTRACTION_SYSTEM_PROMPT = """You are a financial document analysis expert. Extract entities and relationships from text.
+
+Extract:
+1. **Entities**: Organizations, people, locations, monetary amounts, dates, risks/topics
+2. **Relationships**: How entities are connected in the text
+
+Respond with JSON:
+{
+  "entities": [
+    {
+      "name": "Bitcoin",
+      "type": "ORGANIZATION|PERSON|LOCATION|MONEY|DATE|RISK",
+      "properties": {"industry": "cryptocurrency", "description": "..."}
+    }
+  ],
+  "relationships": [
+    {
+      "source_name": "DocuSign",
+      "target_name": "USDC",
+      "relationship_type": "PARTNERS_WITH|DEPENDS_ON|ISSUES|PROVIDES|HAS_RISK|RELATED_TO",
+      "reasoning": "DocuSign partners with Circle for USDC services"
+    }
+  ]
+}
+
+**IMPORTANT**:
+- Extract ALL entities mentioned (companies, people, places, amounts, dates, concepts)
+- Capture ALL relationships explicitly stated in the text
+- Use entity names exactly as they appear
+- Provide clear reasoning for each relationship"""
+
+# Several numbered chunks per request: the same instructions, one result each
+_BATCH_SYSTEM_PROMPT = _EXTRACTION_SYSTEM_PROMPT + """
+
+You may be given several numbered chunks (=== CHUNK n ===). Extract from each chunk on its own and respond with one result per chunk instead:
+{
+  "results": [
+    {"chunk_index": 0, "entities": [...], "relationships": [...]}
+  ]
+}"""
+
+
+class NarrativeLLMCache:
+    """
+    SQLite cache of parsed LLM extraction responses, keyed by prompt hash.
+    
+    Lookups and writes block, so callers on the event loop run them in a
+    worker thread. They never raise: a cache failure only costs an LLM call.
+    """
+    
+    def __init__(self, path: Path, ttl: int):
+        self.ttl = ttl
+        # One connection shared by the worker threads, used under the lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(hash TEXT PRIMARY KEY, response_json TEXT NOT NULL, created_at INTEGER NOT NULL)"
+        )
+        # Expired entries are never read again
+        self.conn.execute("DELETE FROM responses WHERE created_at < ?", (int(time.time()) - ttl,))
+    
+    @staticmethod
+    def key(model_id: str, system_prompt: str, chunk: str) -> str:
+        """SHA-256 of the answering model, the prompt variant and the full chunk"""
+        return hashlib.sha256(
+            f"{model_id}\x00{system_prompt}\x00{chunk}".encode('utf-8', 'surrogatepass')
+        ).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Unexpired cached responses for whichever of keys are present"""
+        if not keys:
+            return {}
+        try:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT hash, response_json FROM responses "
+                    f"WHERE created_at >= ? AND hash IN ({', '.join('?' * len(keys))})",
+                    (int(time.time()) - self.ttl, *keys)
+                ).fetchall()
+            return {key: json.loads(response_json) for key, response_json in rows}
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Narrative LLM cache read failed: {e}")
+            return {}
+    
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Store (key, response) pairs"""
+        if not entries:
+            return
+        try:
+            now = int(time.time())
+            rows = [(key, json.dumps(data), now) for key, data in entries]
+            with self._lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO responses (hash, response_json, created_at) VALUES (?, ?, ?)",
+                    rows
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Narrative LLM cache write failed: {e}")
 
 
 class NarrativeParser:
@@ -33,12 +176,26 @@ class NarrativeParser:
         self.narrative_model = "us.anthropic.claude-3-5-haiku-20241022-v1:0"  # Haiku 3.5
         # Fallback to Sonnet if Haiku not available
         self.fallback_model = settings.BEDROCK_MODEL_ID
+        # Ask for latency-optimized inference on models that offer it; turned
+        # off for the process once Bedrock rejects it (e.g. unsupported region)
+        self.latency_optimized = settings.NARRATIVE_LATENCY_OPTIMIZED
+        
+        # Parsed LLM responses per chunk, so re-ingesting a document skips Bedrock
+        self.llm_cache = None
+        if settings.NARRATIVE_LLM_CACHE_TTL > 0:
+            try:
+                self.llm_cache = NarrativeLLMCache(
+                    Path(settings.CACHE_DIR) / "narrative_llm_cache.db",
+                    settings.NARRATIVE_LLM_CACHE_TTL
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Narrative LLM cache unavailable: {e}")
         
         # Entity patterns for detecting organizations, money, dates, etc.
         self.patterns = {
             "ORGANIZATION": [
                 r'\b[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)*\s+(?:Inc\.?|LLC|Ltd\.?|Corporation|Corp\.?|Company|Co\.?)\b',
-                r'\b(?:Bitcoin|Ethereum|USDC|DocuSign|Apple|Microsoft|Amazon|Google|Circle)\b',
+                _ORGANIZATION_KEYWORDS,
             ],
             "MONEY": [
                 r'\$\s*\d+(?:,\d{3})*(?:\.\d{2})?(?:\s*(?:million|billion|trillion|M|B|T))?',
@@ -53,10 +210,29 @@ class NarrativeParser:
                 r'\b(?:Mr\.?|Mrs\.?|Ms\.?|Dr\.?)\s+[A-Z][a-z]+\s+[A-Z][a-z]+\b',
             ],
             "LOCATION": [
-                r'\b(?:United States|USA|U\.S\.|California|New York|Texas|London|Singapore)\b',
+                _LOCATION_KEYWORDS,
             ],
         }
         
+        # Compiled once per parser, in scan order. Each pattern is a separate
+        # pass: matches from different patterns may overlap (a year inside a
+        # full date), and each is kept as its own entity. Keyword lists stay
+        # tuples and are all resolved by one automaton pass (_scan_keywords)
+        self._compiled_patterns = [
+            (entity_type, pattern if isinstance(pattern, tuple) else re.compile(pattern, re.MULTILINE | re.IGNORECASE))
+            for entity_type, patterns in self.patterns.items()
+            for pattern in patterns
+        ]
+        self._keyword_matcher = ahocorasick.Automaton()
+        for slot, (_, pattern) in enumerate(self._compiled_patterns):
+            if isinstance(pattern, tuple):
+                for rank, keyword in enumerate(pattern):
+                    keyword = keyword.lower()
+                    hits = self._keyword_matcher.get(keyword, [])
+                    hits.append((slot, rank, len(keyword)))
+                    self._keyword_matcher.add_word(keyword, hits)
+        self._keyword_matcher.make_automaton()
+        
         # Risk/topic patterns
         self.risk_patterns = [
             r'^##?\s*(.+?)(?:\n|$)',  # Markdown headers
@@ -90,48 +266,48 @@ class NarrativeParser:
         """
         logger.info(f"Parsing narrative text ({len(markdown)} chars)")
         
-        soup = BeautifulSoup(markdown, 'html.parser')
-        text = soup.get_text()
+        text = _plain_text(markdown)
         
         entities = []
         entity_set = set()  # Prevent duplicates
         
         # Extract named entities (organizations, money, dates, people, locations)
-        for entity_type, patterns in self.patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.MULTILINE | re.IGNORECASE)
-                for match in matches:
-                    entity_text = match.group(0).strip()
-                    
-                    # Skip if duplicate or too short
-                    if entity_text in entity_set or len(entity_text) < 3:
-                        continue
-                    
-                    entity_set.add(entity_text)
-                    
-                    # Map to our entity types
-                    our_type = self._map_entity_type(entity_type)
-                    
-                    entity = Entity(
-                        id=f"entity_{uuid.uuid4().hex[:12]}",
-                        name=entity_text,
-                        type=our_type,
-                        display_type=self._format_display_type(entity_type, our_type, entity_text),
-                        original_type=entity_type,
-                        properties={
-                            "extracted_from": "narrative_text",
-                            "source_type": entity_type,
-                            "document_id": document_id,
-                            "graph_id": graph_id,
-                        },
-                        document_id=document_id,
-                        graph_id=graph_id
-                    )
-                    
-                    entities.append(entity)
-                    
-                    if len(entities) >= max_entities:
-                        break
+        keyword_matches = self._scan_keywords(text)
+        for slot, (entity_type, pattern) in enumerate(self._compiled_patterns):
+            if isinstance(pattern, tuple):
+                matched = keyword_matches.get(slot, [])
+            else:
+                matched = (match.group(0) for match in pattern.finditer(text))
+            
+            for entity_text in matched:
+                entity_text = entity_text.strip()
+                
+                # Skip if duplicate or too short
+                if entity_text in entity_set or len(entity_text) < 3:
+                    continue
+                
+                entity_set.add(entity_text)
+                
+                # Map to our entity types
+                our_type = self._map_entity_type(entity_type)
+                
+                entity = Entity(
+                    id=f"entity_{uuid.uuid4().hex[:12]}",
+                    name=entity_text,
+                    type=our_type,
+                    display_type=self._format_display_type(entity_type, our_type, entity_text),
+                    original_type=entity_type,
+                    properties={
+                        "extracted_from": "narrative_text",
+                        "source_type": entity_type,
+                        "document_id": document_id,
+                        "graph_id": graph_id,
+                    },
+                    document_id=document_id,
+                    graph_id=graph_id
+                )
+                
+                entities.append(entity)
                 
                 if len(entities) >= max_entities:
                     break
@@ -147,6 +323,32 @@ class NarrativeParser:
         
         return entities
     
+    def _scan_keywords(self, text: str) -> Dict[int, List[str]]:
+        """
+        Find every keyword-list match in a single pass over the text.
+        
+        Returns the matched text per pattern slot, with the same results a
+        case-insensitive \\b(?:kw1|kw2|...)\\b finditer would give: leftmost
+        matches first, earlier keywords winning at a position, no overlaps.
+        """
+        candidates = []
+        for end, hits in self._keyword_matcher.iter(lower_ascii(text)):
+            end += 1
+            if not _is_word_boundary(text, end):
+                continue
+            for slot, rank, length in hits:
+                start = end - length
+                if _is_word_boundary(text, start):
+                    candidates.append((start, rank, slot, end))
+        
+        matches = {}
+        scanned_to = {}
+        for start, rank, slot, end in sorted(candidates):
+            if start >= scanned_to.get(slot, 0):
+                matches.setdefault(slot, []).append(text[start:end])
+                scanned_to[slot] = end
+        return matches
+    
     def _extract_risk_entities(
         self,
         text: str,
@@ -163,7 +365,7 @@ class NarrativeParser:
         
         for para in paragraphs[:max_risks]:
             # Extract first sentence or first 200 chars as risk description
-            first_sentence = re.match(r'^([^.!?]{20,250})[.!?]', para)
+            first_sentence = _FIRST_SENTENCE_RE.match(para)
             if first_sentence:
                 risk_text = first_sentence.group(1).strip()
             else:
@@ -234,8 +436,7 @@ class NarrativeParser:
         """
         logger.info(f"Extracting entities + relationships from narrative ({len(markdown)} chars)")
         
-        soup = BeautifulSoup(markdown, 'html.parser')
-        text = soup.get_text()
+        text = _plain_text(markdown)
         
         # Split into manageable chunks (by paragraph boundaries)
         chunks = self._chunk_text(text, chunk_size)
@@ -245,30 +446,48 @@ class NarrativeParser:
         all_edges = []
         entity_map = {}  # Track entities by name to avoid duplicates
         
-        for i, chunk in enumerate(chunks):
-            if len(chunk.strip()) < 50:  # Skip tiny chunks
-                continue
-            
-            logger.info(f"🤖 Processing chunk {i+1}/{len(chunks)} ({len(chunk)} chars)")
-            
-            try:
-                chunk_entities, chunk_edges = await self._extract_from_chunk_with_llm(
-                    chunk, document_id, graph_id, entity_map
-                )
-                
-                # Add new entities
-                for entity in chunk_entities:
-                    if entity.name not in entity_map:
-                        entity_map[entity.name] = entity
-                        all_entities.append(entity)
-                
-                all_edges.extend(chunk_edges)
-                
-                logger.info(f"Chunk {i+1}: {len(chunk_entities)} entities, {len(chunk_edges)} relationships")
-                
-            except Exception as e:
-                logger.warning(f"Failed to process chunk {i+1}: {e}")
+        # Skip tiny chunks; the rest go to the LLM several chunks per request,
+        # with up to NARRATIVE_CONCURRENCY requests in flight
+        pending = [(i, chunk) for i, chunk in enumerate(chunks) if len(chunk.strip()) >= 50]
+        batch_size = max(1, settings.NARRATIVE_CHUNKS_PER_CALL)
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        semaphore = asyncio.Semaphore(max(1, settings.NARRATIVE_CONCURRENCY))
+        
+        async def extract_batch(batch: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                logger.info(f"🤖 Processing chunks {batch[0][0]+1}-{batch[-1][0]+1}/{len(chunks)} ({len(batch)} per request)")
+                return await self._extract_chunks_with_llm([chunk for _, chunk in batch])
+        
+        batch_extractions = await asyncio.gather(
+            *(extract_batch(batch) for batch in batches), return_exceptions=True
+        )
+        
+        # Build entities in document order, so duplicate skipping and edge
+        # resolution see earlier chunks first whatever order requests finished in
+        for batch, extractions in zip(batches, batch_extractions):
+            if isinstance(extractions, BaseException):
+                # A failed batch loses only its own chunks
+                logger.warning(f"Failed to process chunks {batch[0][0]+1}-{batch[-1][0]+1}: {extractions}")
                 continue
+            for (i, _), data in zip(batch, extractions):
+                try:
+                    chunk_entities, chunk_edges = self._build_chunk_graph(
+                        data, document_id, graph_id, entity_map
+                    )
+                    
+                    # Add new entities
+                    for entity in chunk_entities:
+                        if entity.name not in entity_map:
+                            entity_map[entity.name] = entity
+                            all_entities.append(entity)
+                    
+                    all_edges.extend(chunk_edges)
+                    
+                    logger.info(f"Chunk {i+1}: {len(chunk_entities)} entities, {len(chunk_edges)} relationships")
+                    
+                except Exception as e:
+                    logger.warning(f"Failed to process chunk {i+1}: {e}")
+                    continue
         
         logger.info(f"Extracted {len(all_entities)} entities and {len(all_edges)} relationships from narrative")
         
@@ -276,62 +495,107 @@ class NarrativeParser:
     
     def _chunk_text(self, text: str, chunk_size: int) -> List[str]:
         """Split text into chunks at paragraph boundaries"""
-        paragraphs = text.split('\n\n')
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the chunk being built, joined once it is complete;
+        # current_len is the length the joined chunk will have
+        current_paras = []
+        current_len = 0
         
-        for para in paragraphs:
-            if len(current_chunk) + len(para) > chunk_size and current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = para
+        for para in text.split('\n\n'):
+            if current_len + len(para) > chunk_size and current_len:
+                chunks.append("\n\n".join(current_paras))
+                current_paras = [para]
+                current_len = len(para)
+            elif current_len:
+                current_paras.append(para)
+                current_len += 2 + len(para)
             else:
-                current_chunk += "\n\n" + para if current_chunk else para
+                current_paras = [para]
+                current_len = len(para)
         
-        if current_chunk:
-            chunks.append(current_chunk)
+        if current_len:
+            chunks.append("\n\n".join(current_paras))
         
         return chunks
     
-    async def _extract_from_chunk_with_llm(
-        self,
-        chunk: str,
-        document_id: str,
-        graph_id: str,
-        existing_entity_map: Dict[str, Entity]
-    ) -> Tuple[List[Entity], List[Edge]]:
-        """Use LLM to extract entities and relationships from a single text chunk"""
+    async def _extract_chunks_with_llm(self, chunks: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the LLM's entities + relationships for several chunks in one request.
         
-        system_prompt = """You are a financial document analysis expert. Extract entities and relationships from text.
-
-Extract:
-1. **Entities**: Organizations, people, locations, monetary amounts, dates, risks/topics
-2. **Relationships**: How entities are connected in the text
-
-Respond with JSON:
-{
-  "entities": [
-    {
-      "name": "Bitcoin",
-      "type": "ORGANIZATION|PERSON|LOCATION|MONEY|DATE|RISK",
-      "properties": {"industry": "cryptocurrency", "description": "..."}
-    }
-  ],
-  "relationships": [
-    {
-      "source_name": "DocuSign",
-      "target_name": "USDC",
-      "relationship_type": "PARTNERS_WITH|DEPENDS_ON|ISSUES|PROVIDES|HAS_RISK|RELATED_TO",
-      "reasoning": "DocuSign partners with Circle for USDC services"
-    }
-  ]
-}
+        Returns the parsed response for each chunk, in order. Chunks with a
+        cached response from the primary model skip the LLM. Chunks missing
+        from the batched answer, or all of them if it fails, are retried with
+        one request each.
+        """
+        extractions: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        if self.llm_cache:
+            # A chunk may have been answered in a batch or on its own
+            lookup_keys = [
+                (
+                    NarrativeLLMCache.key(self.narrative_model, _BATCH_SYSTEM_PROMPT, chunk),
+                    NarrativeLLMCache.key(self.narrative_model, _EXTRACTION_SYSTEM_PROMPT, chunk),
+                )
+                for chunk in chunks
+            ]
+            cached = await asyncio.to_thread(
+                self.llm_cache.get_many, [key for chunk_keys in lookup_keys for key in chunk_keys]
+            )
+            extractions = [
+                next((cached[key] for key in chunk_keys if key in cached), None) for chunk_keys in lookup_keys
+            ]
+        missing = [chunk_idx for chunk_idx, extraction in enumerate(extractions) if extraction is None]
+        # Chunk index -> cache key for answers worth keeping
+        answer_keys: Dict[int, str] = {}
+        
+        if len(missing) > 1:
+            numbered_chunks = "\n\n".join(
+                f"=== CHUNK {batch_idx} ===\n{chunks[chunk_idx][:1500]}" for batch_idx, chunk_idx in enumerate(missing)
+            )
+            user_prompt = f"""Analyze these text chunks and extract entities + relationships from each:
 
-**IMPORTANT**:
-- Extract ALL entities mentioned (companies, people, places, amounts, dates, concepts)
-- Capture ALL relationships explicitly stated in the text
-- Use entity names exactly as they appear
-- Provide clear reasoning for each relationship"""
+{numbered_chunks}
 
+Provide JSON response with one result per chunk."""
+            
+            try:
+                llm_response, model_id = await self._invoke_llm(
+                    _BATCH_SYSTEM_PROMPT,
+                    user_prompt,
+                    max_tokens=min(2048 * len(missing), MAX_OUTPUT_TOKENS)
+                )
+                parsed = self._parse_json_response(llm_response) if llm_response else None
+                if isinstance(parsed, dict):
+                    for result in parsed.get("results", []):
+                        batch_idx = result.get("chunk_index") if isinstance(result, dict) else None
+                        if isinstance(batch_idx, int) and 0 <= batch_idx < len(missing):
+                            chunk_idx = missing[batch_idx]
+                            extractions[chunk_idx] = result
+                            answer_keys[chunk_idx] = NarrativeLLMCache.key(
+                                model_id, _BATCH_SYSTEM_PROMPT, chunks[chunk_idx]
+                            )
+            except Exception as e:
+                logger.warning(f"Batched LLM extraction failed, retrying chunks one at a time: {e}")
+        
+        for chunk_idx in missing:
+            if extractions[chunk_idx] is None:
+                extractions[chunk_idx], model_id = await self._extract_chunk_with_llm(chunks[chunk_idx])
+                if model_id:
+                    answer_keys[chunk_idx] = NarrativeLLMCache.key(
+                        model_id, _EXTRACTION_SYSTEM_PROMPT, chunks[chunk_idx]
+                    )
+        
+        if self.llm_cache:
+            # Failed or unparsable answers come back empty; only real ones are kept
+            await asyncio.to_thread(self.llm_cache.set_many, [
+                (key, extractions[chunk_idx])
+                for chunk_idx, key in answer_keys.items()
+                if extractions[chunk_idx].get("entities") or extractions[chunk_idx].get("relationships")
+            ])
+        
+        return extractions
+    
+    async def _extract_chunk_with_llm(self, chunk: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Get the LLM's entities + relationships for a single text chunk, and the model that answered"""
         user_prompt = f"""Analyze this text and extract entities + relationships:
 
 {chunk[:1500]}  
@@ -339,126 +603,155 @@ Respond with JSON:
 Provide JSON response."""
 
         try:
-            # Try Haiku first (10x cheaper, 2x faster)
+            llm_response, model_id = await self._invoke_llm(_EXTRACTION_SYSTEM_PROMPT, user_prompt, max_tokens=2048)
+            if not llm_response:
+                return {}, None
+            
+            # Valid JSON that isn't an object (a bare list or scalar) holds nothing usable
+            extraction = self._parse_json_response(llm_response)
+            return (extraction, model_id) if isinstance(extraction, dict) else ({}, None)
+            
+        except Exception as e:
+            logger.error(f"Error in LLM extraction from chunk: {e}")
+            return {}, None
+    
+    async def _invoke_llm(self, system_prompt: str, user_prompt: str, max_tokens: int) -> Tuple[Optional[str], str]:
+        """Call Haiku, falling back to Sonnet; returns the response text and the model that answered"""
+        # No cache_control on the system prompt: at a few hundred tokens it is
+        # below the models' minimum cacheable prefix, so it would be ignored
+        body = json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": 0.3,
+            "system": system_prompt,
+            "messages": [{"role": "user", "content": user_prompt}]
+        })
+        
+        # Try Haiku first (10x cheaper, 2x faster); boto3 blocks, so calls run
+        # in worker threads and concurrent requests overlap
+        model_id = self.narrative_model
+        try:
+            response_body = await asyncio.to_thread(self._invoke_model, model_id, body)
+            logger.debug("Using Haiku for narrative extraction (cost-optimized)")
+        except Exception as haiku_error:
+            logger.warning(f"Haiku failed, falling back to Sonnet: {haiku_error}")
+            model_id = self.fallback_model
+            response_body = await asyncio.to_thread(self._invoke_model, model_id, body)
+        
+        for block in response_body.get('content', []):
+            if block.get('type') == 'text':
+                return block.get('text', ''), model_id
+        return None, model_id
+    
+    def _invoke_model(self, model_id: str, body: str) -> Dict[str, Any]:
+        """Blocking Bedrock call, returning the decoded response body"""
+        rejected = None
+        if self.latency_optimized and any(model in model_id for model in _LATENCY_OPTIMIZED_MODELS):
             try:
                 response = self.bedrock.invoke_model(
-                    modelId=self.narrative_model,
-                    body=json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 2048,
-                        "temperature": 0.3,
-                        "system": system_prompt,
-                        "messages": [{"role": "user", "content": user_prompt}]
-                    })
-                )
-                logger.debug("Using Haiku for narrative extraction (cost-optimized)")
-            except Exception as haiku_error:
-                logger.warning(f"Haiku failed, falling back to Sonnet: {haiku_error}")
-                response = self.bedrock.invoke_model(
-                    modelId=self.fallback_model,
-                    body=json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 2048,
-                        "temperature": 0.3,
-                        "system": system_prompt,
-                        "messages": [{"role": "user", "content": user_prompt}]
-                    })
+                    modelId=model_id,
+                    body=body,
+                    performanceConfigLatency="optimized"
                 )
+                return json.loads(response['body'].read())
+            except (ClientError, ParamValidationError) as e:
+                if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") != "ValidationException":
+                    raise
+                rejected = e
+        
+        response = self.bedrock.invoke_model(
+            modelId=model_id,
+            body=body
+        )
+        if rejected:
+            # Standard inference took the same request, so it was the latency
+            # setting that was refused; stop asking for it
+            logger.warning(f"Latency-optimized inference unavailable for {model_id}, using standard: {rejected}")
+            self.latency_optimized = False
+        return json.loads(response['body'].read())
+    
+    def _build_chunk_graph(
+        self,
+        data: Dict[str, Any],
+        document_id: str,
+        graph_id: str,
+        existing_entity_map: Dict[str, Entity]
+    ) -> Tuple[List[Entity], List[Edge]]:
+        """Convert a chunk's parsed LLM response to Entity and Edge objects"""
+        entities = []
+        edges = []
+        
+        # Create entities
+        for ent_data in data.get("entities", []):
+            entity_name = ent_data.get("name", "").strip()
+            if not entity_name or entity_name in existing_entity_map:
+                continue  # Skip duplicates
             
-            response_body = json.loads(response['body'].read())
-            content = response_body.get('content', [])
-            
-            llm_response = None
-            for block in content:
-                if block.get('type') == 'text':
-                    llm_response = block.get('text', '')
-                    break
-            
-            if not llm_response:
-                return [], []
-            
-            # Parse JSON
-            data = self._parse_json_response(llm_response)
-            
-            # Convert to Entity and Edge objects
-            entities = []
-            edges = []
+            entity_type_str = ent_data.get("type", "RISK")
+            entity_type = self._map_llm_entity_type(entity_type_str)
+            display_type = ent_data.get("display_type") or self._format_display_type(
+                entity_type_str,
+                entity_type,
+                entity_name
+            )
             
-            # Create entities
-            for ent_data in data.get("entities", []):
-                entity_name = ent_data.get("name", "").strip()
-                if not entity_name or entity_name in existing_entity_map:
-                    continue  # Skip duplicates
-                
-                entity_type_str = ent_data.get("type", "RISK")
-                entity_type = self._map_llm_entity_type(entity_type_str)
-                display_type = ent_data.get("display_type") or self._format_display_type(
-                    entity_type_str,
-                    entity_type,
-                    entity_name
-                )
-                
-                entity = Entity(
-                    id=f"entity_{uuid.uuid4().hex[:12]}",
-                    name=entity_name,
-                    type=entity_type,
-                    display_type=display_type,
-                    original_type=entity_type_str,
-                    properties={
-                        **ent_data.get("properties", {}),
-                        "extracted_from": "narrative_llm",
-                        "document_id": document_id,
-                        "graph_id": graph_id,
-                    },
-                    document_id=document_id,
-                    graph_id=graph_id
-                )
-                entities.append(entity)
+            entity = Entity(
+                id=f"entity_{uuid.uuid4().hex[:12]}",
+                name=entity_name,
+                type=entity_type,
+                display_type=display_type,
+                original_type=entity_type_str,
+                properties={
+                    **ent_data.get("properties", {}),
+                    "extracted_from": "narrative_llm",
+                    "document_id": document_id,
+                    "graph_id": graph_id,
+                },
+                document_id=document_id,
+                graph_id=graph_id
+            )
+            entities.append(entity)
+        
+        # Create temporary map including new entities
+        temp_entity_map = {**existing_entity_map}
+        for entity in entities:
+            temp_entity_map[entity.name] = entity
+        
+        # Create edges
+        for rel_data in data.get("relationships", []):
+            source_name = rel_data.get("source_name", "").strip()
+            target_name = rel_data.get("target_name", "").strip()
             
-            # Create temporary map including new entities
-            temp_entity_map = {**existing_entity_map}
-            for entity in entities:
-                temp_entity_map[entity.name] = entity
+            # Find entities
+            source_entity = temp_entity_map.get(source_name)
+            target_entity = temp_entity_map.get(target_name)
             
-            # Create edges
-            for rel_data in data.get("relationships", []):
-                source_name = rel_data.get("source_name", "").strip()
-                target_name = rel_data.get("target_name", "").strip()
-                
-                # Find entities
-                source_entity = temp_entity_map.get(source_name)
-                target_entity = temp_entity_map.get(target_name)
-                
-                if not source_entity or not target_entity:
-                    continue  # Skip if entities not found
-                
-                edge_type_str = rel_data.get("relationship_type", "RELATED_TO")
-                edge_type = self.edge_type_mapping.get(edge_type_str, EdgeType.RELATED_TO)
-                
-                edge = Edge(
-                    id=f"edge_{uuid.uuid4().hex[:12]}",
-                    source=source_entity.id,
-                    target=target_entity.id,
-                    type=edge_type,
-                    graph_id=graph_id,
-                    properties={
-                        "reasoning": rel_data.get("reasoning", ""),
-                        "detected_by": "narrative_llm",
-                        "confidence": 0.85
-                    }
-                )
-                edges.append(edge)
+            if not source_entity or not target_entity:
+                continue  # Skip if entities not found
             
-            return entities, edges
+            edge_type_str = rel_data.get("relationship_type", "RELATED_TO")
+            edge_type = self.edge_type_mapping.get(edge_type_str, EdgeType.RELATED_TO)
             
-        except Exception as e:
-            logger.error(f"Error in LLM extraction from chunk: {e}")
-            return [], []
+            edge = Edge(
+                id=f"edge_{uuid.uuid4().hex[:12]}",
+                source=source_entity.id,
+                target=target_entity.id,
+                type=edge_type,
+                graph_id=graph_id,
+                properties={
+                    "reasoning": rel_data.get("reasoning", ""),
+                    "detected_by": "narrative_llm",
+                    "confidence": 0.85
+                }
+            )
+            edges.append(edge)
+        
+        return entities, edges
     
     def _parse_json_response(self, llm_response: str) -> Dict[str, Any]:
         """Parse JSON from LLM response"""
         # Try to find JSON in code blocks
-        fenced_match = re.search(r'```(?:json)?\s*([\s\S]+?)\s*```', llm_response, re.IGNORECASE)
+        fenced_match = _FENCED_JSON_RE.search(llm_response)
         if fenced_match:
             json_str = fenced_match.group(1)
         else:
@@ -469,7 +762,7 @@ Provide JSON response."""
             return json.loads(json_str)
         except json.JSONDecodeError:
             # Try to find JSON object
-            match = re.search(r'\{[\s\S]+\}', json_str)
+            match = _JSON_OBJECT_RE.search(json_str)
             if match:
                 return json.loads(match.group(0))
             return {"entities": [], "relationships": []}
@@ -1,21 +1,51 @@
 """
 Graph normalization service - converts ADE output to graph entities and edges
 """
+import asyncio
+import multiprocessing
 import uuid
 import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, List, Tuple, Optional
 from loguru import logger
 
+from config import settings
 from models.entity import Entity, EntityType
 from models.edge import Edge, EdgeType
 from models.citation import Citation
 from services.relationship_detector import RelationshipDetector
 from services.markdown_parser import MarkdownTableParser
 from services.document_type_detector import DocumentTypeDetector
-from services.invoice_parser import InvoiceParser
-from services.contract_parser import ContractParser
-from services.loan_parser import LoanParser
 from services.narrative_parser import NarrativeParser
+from services import parser_worker
+
+# Deterministic parsers are CPU-bound (HTML parsing + regex); they run in a
+# small pool of worker processes so a large document neither blocks the event
+# loop nor holds the GIL. Workers are spawned rather than forked so they don't
+# inherit the server's threads, sockets and client state; they run the
+# import-safe entry points in services.parser_worker.
+_parser_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parser_pool() -> ProcessPoolExecutor:
+    """Create the parser process pool on first use"""
+    global _parser_pool
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.PARSER_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=parser_worker.init_worker
+        )
+    return _parser_pool
+
+
+def _discard_parser_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken parser pool so the next parse starts a fresh one"""
+    global _parser_pool
+    if _parser_pool is pool:
+        _parser_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
 
 
 class NormalizationService:
@@ -41,11 +71,45 @@ class NormalizationService:
         self.relationship_detector = RelationshipDetector()
         self.markdown_parser = MarkdownTableParser()
         self.doc_type_detector = DocumentTypeDetector()
-        self.invoice_parser = InvoiceParser()
-        self.contract_parser = ContractParser()
-        self.loan_parser = LoanParser()
         self.narrative_parser = NarrativeParser()
     
+    async def _run_parser(self, parser_name: str, markdown: str, document_id: str, graph_id: str) -> List[Entity]:
+        """
+        Run a deterministic parser in the parser process pool.
+        
+        A worker that dies breaks the whole pool; it is then replaced and the
+        parse retried once, so one crash doesn't fail every later document.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = _get_parser_pool()
+            try:
+                entity_dicts = await loop.run_in_executor(
+                    pool, parser_worker.parse_document, parser_name, markdown, document_id, graph_id
+                )
+                break
+            except BrokenProcessPool:
+                _discard_parser_pool(pool)
+                if attempt:
+                    raise
+                logger.warning(f"Parser pool broke while parsing {document_id}, retrying in a new pool")
+        return [Entity.model_validate(entity_dict) for entity_dict in entity_dicts]
+    
+    async def close(self):
+        """Shut down the parser process pool; safe to call more than once"""
+        global _parser_pool
+        if _parser_pool is not None:
+            _parser_pool.shutdown(cancel_futures=True)
+            _parser_pool = None
+    
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+    
     async def normalize_to_graph(
         self,
         ade_output: Dict[str, Any],
@@ -250,17 +314,11 @@ class NormalizationService:
             
             # Use specialized parser based on document type
             if doc_type == "invoice":
-                entities = self.invoice_parser.extract_entities_from_invoice(
-                    markdown, document_id, graph_id
-                )
+                entities = await self._run_parser("invoice", markdown, document_id, graph_id)
             elif doc_type == "contract":
-                entities = self.contract_parser.extract_entities_from_contract(
-                    markdown, document_id, graph_id
-                )
+                entities = await self._run_parser("contract", markdown, document_id, graph_id)
             elif doc_type == "loan_document":
-                entities = self.loan_parser.extract_entities_from_loan(
-                    markdown, document_id, graph_id
-                )
+                entities = await self._run_parser("loan", markdown, document_id, graph_id)
             else:
                 # Default to table parser for financial statements and generic docs
                 entities = await self._extract_entities_from_tables(
@@ -0,0 +1,41 @@
+"""
+Entry points for the deterministic parser worker processes
+Kept free of service construction so spawned workers import only the parsers
+"""
+import sys
+from typing import Any, Dict, List
+from loguru import logger
+
+from config import settings
+from services.invoice_parser import InvoiceParser
+from services.contract_parser import ContractParser
+from services.loan_parser import LoanParser
+
+
+# Parser name -> (class, method); each worker builds its own parser instances
+PARSERS = {
+    "invoice": (InvoiceParser, "extract_entities_from_invoice"),
+    "contract": (ContractParser, "extract_entities_from_contract"),
+    "loan": (LoanParser, "extract_entities_from_loan"),
+}
+_parsers: Dict[str, Any] = {}
+
+
+def init_worker() -> None:
+    """Configure logging in a freshly spawned worker.
+    
+    Workers log to stderr only. The server's rotating log file is left to the
+    server process, since loguru's rotation is not safe across processes.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level=settings.LOG_LEVEL)
+
+
+def parse_document(parser_name: str, markdown: str, document_id: str, graph_id: str) -> List[Dict[str, Any]]:
+    """Run a deterministic parser by name and return its entities as plain dicts"""
+    parser_class, method = PARSERS[parser_name]
+    parser = _parsers.get(parser_name)
+    if parser is None:
+        parser = _parsers[parser_name] = parser_class()
+    entities = getattr(parser, method)(markdown, document_id, graph_id)
+    return [entity.model_dump() for entity in entities]
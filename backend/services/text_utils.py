@@ -0,0 +1,32 @@
+"""
+Text and id helpers shared by the deterministic document parsers
+"""
+import itertools
+import re
+import secrets
+import string
+
+
+# Anything the HTML parser would change: tags, entities, CR newlines, NULs
+MARKUP_RE = re.compile(r'[<&\r\x00]')
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def lower_ascii(text: str) -> str:
+    """Lower-case ASCII letters only, so offsets still line up with `text`"""
+    return text.lower() if text.isascii() else text.translate(_ASCII_LOWER)
+
+
+def match_original(text: str, match: re.Match, group: int = 1) -> str:
+    """Group of a match on the lowered text, sliced from the original text"""
+    return text[match.start(group):match.end(group)]
+
+
+def new_entity_ids():
+    """Entity ids for one document: a single random prefix plus a counter.
+    
+    The 64-bit prefix keeps ids from separate documents from colliding once
+    many documents have been parsed into the same store.
+    """
+    prefix = secrets.token_hex(8)
+    return (f"ent_{prefix}{n:04x}" for n in itertools.count())
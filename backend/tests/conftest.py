@@ -0,0 +1,10 @@
+"""
+Shared test setup
+"""
+import os
+
+
+# Settings has no defaults for credentials; placeholder values let the
+# service modules import without a .env (no test talks to these services)
+for _name in ("LANDINGAI_API_KEY", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "NEO4J_PASSWORD"):
+    os.environ.setdefault(_name, "test")
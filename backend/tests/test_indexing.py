@@ -0,0 +1,83 @@
+"""
+Tests for the indexing service's chunking, page-number math and JSON encoding
+"""
+import json
+import random
+from decimal import Decimal
+
+import pytest
+
+from services.indexing import IndexingService, _dumps
+
+
+def _reference_chunks(text, chunk_size, overlap):
+    """Word chunks as they were built by re-joining split words"""
+    words = text.split()
+    chunks = []
+    
+    i = 0
+    while i < len(words):
+        chunks.append(' '.join(words[i:i + chunk_size]))
+        i += (chunk_size - overlap)
+        if i >= len(words):
+            break
+    
+    return chunks
+
+
+def _reference_page_numbers(total_chunks, total_pages):
+    """Per-chunk page numbers as they were computed inside the indexing loop"""
+    if total_pages and total_pages > 0:
+        chunks_per_page = max(1, total_chunks / total_pages)
+    else:
+        chunks_per_page = 2.0
+        total_pages = max(1, (total_chunks + 1) // 2)
+    return [min(int(idx / chunks_per_page) + 1, total_pages) for idx in range(total_chunks)]
+
+
+def _chunks(text, chunk_size, overlap):
+    spans = IndexingService._word_spans(text)
+    return list(IndexingService._iter_chunks(text, spans, chunk_size, overlap))
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(500, 100), (5, 2), (3, 0), (4, 3), (1, 0)])
+def test_iter_chunks_matches_word_join(chunk_size, overlap):
+    rng = random.Random(chunk_size * 31 + overlap)
+    for _ in range(500):
+        text = ''.join(rng.choice(["word", "x", " ", "  ", "\n", "\t", "é"]) for _ in range(rng.randint(0, 60)))
+        chunks = _chunks(text, chunk_size, overlap)
+        # Chunks are sliced from the original text, so only whitespace may differ
+        assert [' '.join(chunk.split()) for chunk in chunks] == _reference_chunks(text, chunk_size, overlap)
+        assert len(chunks) == IndexingService._count_chunks(len(text.split()), chunk_size, overlap)
+
+
+def test_iter_chunks_keeps_original_whitespace():
+    text = "  alpha  beta\ngamma\tdelta\n"
+    assert _chunks(text, 3, 1) == ["alpha  beta\ngamma", "gamma\tdelta"]
+
+
+@pytest.mark.parametrize("total_pages", [None, 0, -1, 1, 2, 3, 7, 50, 1000])
+def test_page_numbers_match_per_chunk_formula(total_pages):
+    for total_chunks in range(0, 120):
+        assert IndexingService._page_numbers(total_chunks, total_pages) == \
+            _reference_page_numbers(total_chunks, total_pages)
+
+
+def test_page_numbers_are_plain_ints():
+    assert all(type(page) is int for page in IndexingService._page_numbers(10, 3))
+
+
+def test_dumps_round_trips():
+    value = {"name": "Acme", "amount": 12.5, "refs": ["a", "b"], "nested": {"n": None}}
+    assert json.loads(_dumps(value)) == value
+
+
+def test_dumps_wide_integers_fall_back_to_stdlib():
+    value = {"account_number": 2 ** 70, "negative": -(2 ** 64), "small": 1}
+    assert json.loads(_dumps(value)) == value
+
+
+def test_dumps_stringifies_unknown_types():
+    assert json.loads(_dumps({"amount": Decimal("1.50")})) == {"amount": "1.50"}
+    # The stdlib fallback stringifies them the same way
+    assert json.loads(_dumps({"amount": Decimal("1.50"), "id": 2 ** 70})) == {"amount": "1.50", "id": 2 ** 70}
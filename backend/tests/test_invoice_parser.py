@@ -0,0 +1,78 @@
+"""
+Equivalence tests for the invoice parser's run-anchored patterns
+"""
+import random
+import re
+
+import pytest
+
+from services.invoice_parser import _LINE_ITEM_TEXT_RE, _VENDOR_PATTERNS
+from services.text_utils import lower_ascii, match_original
+
+
+# The company-suffix vendor pattern before it was anchored at run starts
+_REFERENCE_VENDOR_RE = re.compile(r'([A-Z][A-Za-z\s&,\.]+(?:Inc|LLC|Ltd|Corp|Company))', re.IGNORECASE)
+
+# The text line item pattern before it was anchored at run starts
+_REFERENCE_LINE_ITEM_TEXT_RE = re.compile(r'([A-Za-z\s\-]+)\s+(\d+)\s+\$?([\d,]+\.?\d{0,2})\s+\$?([\d,]+\.?\d{0,2})')
+
+_VENDOR_WORDS = [
+    "Acme", "acme", "Widgets", "&", "Co", ",", ".", " ", "  ", "\n", "Inc", "inc.", "LLC",
+    "Ltd", "Corp", "Company", "Companies", "incorporated", "1", "42", "-", "(", ")", "é", "x",
+]
+_LINE_ITEM_WORDS = [
+    "Widget", "bolts", "-", " ", "  ", "\n", "\t", "2", "10", "$", "$5.00", "1,200.5", "3.", ",", ".", "x",
+]
+
+
+def _random_texts(words, count, seed):
+    """Reproducible random texts built from a small vocabulary"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(words) + rng.choice(['', ' ']) for _ in range(rng.randint(0, 16)))
+
+
+def _vendor_name(pattern, text):
+    """Vendor name the new pattern reports, read from the original text"""
+    match = pattern.search(lower_ascii(text))
+    return match_original(text, match) if match else None
+
+
+def _reference_vendor_name(text):
+    """Vendor name the unanchored pattern reports"""
+    match = _REFERENCE_VENDOR_RE.search(text)
+    return match.group(1) if match else None
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Acme Widgets Inc",
+    "Billed by: Acme, Widgets & Sons LLC\nTotal: $5",
+    "...  , Acme Corp",
+    "12 Main Street, Globex Company",
+    "inc inc inc",
+    "x" * 2000,
+])
+def test_vendor_pattern_known_texts(text):
+    assert _vendor_name(_VENDOR_PATTERNS[1], text) == _reference_vendor_name(text)
+
+
+def test_vendor_pattern_matches_unanchored_search():
+    for text in _random_texts(_VENDOR_WORDS, 20000, seed=5):
+        assert _vendor_name(_VENDOR_PATTERNS[1], text) == _reference_vendor_name(text), repr(text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Widget 2 $5.00 $10.00\nHeavy-duty bolts 10 1,200.50 12,005.00",
+    "Consulting services 3 150 450 Support 1 99.5 99.5",
+])
+def test_line_item_pattern_known_texts(text):
+    assert [m.groups() for m in _LINE_ITEM_TEXT_RE.finditer(text)] == \
+        [m.groups() for m in _REFERENCE_LINE_ITEM_TEXT_RE.finditer(text)]
+
+
+def test_line_item_pattern_matches_unanchored_finditer():
+    for text in _random_texts(_LINE_ITEM_WORDS, 20000, seed=13):
+        expected = [m.groups() for m in _REFERENCE_LINE_ITEM_TEXT_RE.finditer(text)]
+        assert [m.groups() for m in _LINE_ITEM_TEXT_RE.finditer(text)] == expected, repr(text)
@@ -0,0 +1,136 @@
+"""
+Equivalence tests for the loan parser's single-pass fee and keyword scans
+Each scan is checked against the per-pattern logic it replaced
+"""
+import random
+import re
+
+import pytest
+
+from services.loan_parser import LoanParser
+from services.text_utils import lower_ascii
+
+
+# The per-pattern fee search the fused _FEES_RE replaced
+_REFERENCE_FEE_PATTERNS = [
+    (r'origination\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "origination_fee"),
+    (r'processing\s+fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "processing_fee"),
+    (r'late\s+(?:payment\s+)?fee:?\s*\$?\s*([\d,]+\.?\d{0,2})', "late_fee"),
+    (r'prepayment\s+penalty:?\s*\$?\s*([\d,]+\.?\d{0,2})', "prepayment_penalty"),
+    (r'commitment\s+fee:?\s*([\d\.]+)\s*%', "commitment_fee")
+]
+
+_FEE_WORDS = [
+    "origination", "Origination", "processing", "PROCESSING", "late", "Late", "payment",
+    "prepayment", "penalty", "Penalty", "commitment", "fee", "Fee", "fee:", "FEE:",
+    "$", "$1,250.00", "1,250.00", "500", "0.5", "3.25", "%", "1.2.3", "apr", "due",
+    " ", "  ", "\n", ":", ".", ",", "x",
+]
+
+_KEYWORD_WORDS = [
+    "term", "loan", "Term Loan", "revolving", "credit", "line of", "Line of Credit",
+    "mortgage", "Mortgages", "bridge", "Bridge loan", "fixed", "rate", "Fixed Rate",
+    "interest", "variable", "Variable", "adjustable", "floating", "FLOATING",
+    "monthly", "Quarterly", "annually", "semi-annually", " ", "\n", ",", "x",
+]
+
+
+def _reference_fees(text):
+    """Fee extraction as it ran before the patterns were fused"""
+    fees = []
+    for pattern, fee_type in _REFERENCE_FEE_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            amount_str = match.group(1).replace(',', '')
+            if '%' in pattern:
+                fees.append({
+                    "name": fee_type.replace('_', ' ').title(),
+                    "fee_type": fee_type,
+                    "percentage": float(amount_str)
+                })
+            else:
+                fees.append({
+                    "name": fee_type.replace('_', ' ').title(),
+                    "fee_type": fee_type,
+                    "amount": float(amount_str)
+                })
+    return fees
+
+
+def _reference_keywords(text):
+    """Keyword fields as they were resolved with one substring test each"""
+    data = {}
+    lowered = text.lower()
+    for loan_type in ["term loan", "revolving credit", "line of credit", "mortgage", "bridge loan"]:
+        if loan_type in lowered:
+            data["loan_type"] = loan_type
+            break
+    if "fixed rate" in lowered or "fixed interest" in lowered:
+        data["rate_type"] = "fixed"
+    elif "variable rate" in lowered or "adjustable" in lowered or "floating" in lowered:
+        data["rate_type"] = "variable"
+    if "monthly" in lowered:
+        data["payment_frequency"] = "monthly"
+    elif "quarterly" in lowered:
+        data["payment_frequency"] = "quarterly"
+    elif "annually" in lowered:
+        data["payment_frequency"] = "annually"
+    return data
+
+
+def _outcome(func, *args):
+    """Result of func(*args), or the type of the exception it raised"""
+    try:
+        return func(*args)
+    except ValueError as e:
+        return type(e)
+
+
+def _random_texts(words, count, seed):
+    """Reproducible random texts built from a small vocabulary"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(words) + rng.choice(['', ' ', ' ', '\n']) for _ in range(rng.randint(0, 16)))
+
+
+@pytest.fixture(scope="module")
+def parser():
+    return LoanParser()
+
+
+class TestExtractFees:
+    """The fused fee scan against one search per fee pattern"""
+    
+    @pytest.mark.parametrize("text", [
+        "",
+        "Origination Fee: $1,250.00",
+        "Late Payment Fee: $50 and a late fee: $25",
+        "Commitment fee: 0.5 % per annum. Processing fee $300",
+        "Prepayment Penalty: 2,000\nOrigination fee 1,000.5",
+        "commitment fee: 0.5 processing fee: 10 commitment fee: 0.25%",
+        "late fee: origination fee: 100",
+    ])
+    def test_known_documents(self, parser, text):
+        assert parser._extract_fees(lower_ascii(text)) == _reference_fees(text)
+    
+    def test_matches_per_pattern_search(self, parser):
+        for text in _random_texts(_FEE_WORDS, 20000, seed=7):
+            expected = _outcome(_reference_fees, text)
+            assert _outcome(parser._extract_fees, lower_ascii(text)) == expected, repr(text)
+
+
+class TestScanKeywords:
+    """The keyword automaton against one substring test per keyword"""
+    
+    @pytest.mark.parametrize("text", [
+        "",
+        "This Term Loan bears a floating rate, payable quarterly",
+        "A mortgage and a revolving credit facility at a Fixed Interest rate",
+        "Variable rate, adjustable annually and monthly",
+    ])
+    def test_known_documents(self, parser, text):
+        assert parser._scan_keywords(lower_ascii(text)) == _reference_keywords(text)
+    
+    def test_matches_substring_checks(self, parser):
+        for text in _random_texts(_KEYWORD_WORDS, 20000, seed=11):
+            assert parser._scan_keywords(lower_ascii(text)) == _reference_keywords(text), repr(text)
@@ -0,0 +1,75 @@
+"""
+Tests for the narrative parser's keyword automaton and LLM response cache
+"""
+import random
+import re
+
+import pytest
+
+from config import settings
+from services.narrative_parser import NarrativeLLMCache, NarrativeParser
+
+
+# The keyword alternations the automaton replaced, in pattern order
+_REFERENCE_KEYWORD_RES = [
+    re.compile(r'\b(?:Bitcoin|Ethereum|USDC|DocuSign|Apple|Microsoft|Amazon|Google|Circle)\b', re.MULTILINE | re.IGNORECASE),
+    re.compile(r'\b(?:United States|USA|U\.S\.|California|New York|Texas|London|Singapore)\b', re.MULTILINE | re.IGNORECASE),
+]
+
+_KEYWORD_WORDS = [
+    "bitcoin", "BITCOIN", "Apple", "apples", "xApple", "_usa", "USA", "U.S.", "U.S.A", "u.s.x",
+    "united states", "United  States", "New York", "new yorker", "Texas", "texas_", "Ünited",
+    "é", "-", ".", " ", "\n", "9", "London", "London2", "Singaporean", "Circle", "circ", "le", "Amazon",
+]
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    monkeypatch.setattr(settings, "NARRATIVE_LLM_CACHE_TTL", 0)
+    return NarrativeParser()
+
+
+def _keyword_slots(parser):
+    """Pattern slots holding keyword lists, in scan order"""
+    return [slot for slot, (_, pattern) in enumerate(parser._compiled_patterns) if isinstance(pattern, tuple)]
+
+
+def _reference_matches(parser, text):
+    """Matched text per keyword slot, as the regex alternations found it"""
+    return {
+        slot: [match.group(0) for match in regex.finditer(text)]
+        for slot, regex in zip(_keyword_slots(parser), _REFERENCE_KEYWORD_RES)
+    }
+
+
+def _scanned_matches(parser, text):
+    found = parser._scan_keywords(text)
+    return {slot: found.get(slot, []) for slot in _keyword_slots(parser)}
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Apple and Microsoft expanded in the United States and London.",
+    "Operations in the U.S. and U.S.A; pineapple and Applesauce are not companies",
+    "NEW YORK, Texas_, Singapore\nCircle issues USDC",
+])
+def test_scan_keywords_known_texts(parser, text):
+    assert _scanned_matches(parser, text) == _reference_matches(parser, text)
+
+
+def test_scan_keywords_matches_regex_alternations(parser):
+    rng = random.Random(3)
+    for _ in range(20000):
+        text = ''.join(rng.choice(_KEYWORD_WORDS) + rng.choice(['', ' ', '', '.']) for _ in range(rng.randint(0, 12)))
+        assert _scanned_matches(parser, text) == _reference_matches(parser, text), repr(text)
+
+
+def test_llm_cache_is_keyed_by_model_and_prompt(tmp_path):
+    cache = NarrativeLLMCache(tmp_path / "cache.db", ttl=60)
+    key = cache.key("model-a", "prompt", "chunk")
+    cache.set_many([(key, {"entities": []})])
+
+    assert cache.get_many([key]) == {key: {"entities": []}}
+    assert cache.key("model-b", "prompt", "chunk") != key
+    assert cache.key("model-a", "other prompt", "chunk") != key
+    assert cache.get_many([cache.key("model-b", "prompt", "chunk")]) == {}